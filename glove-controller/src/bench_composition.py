@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Benchmark: glove nodes as separate processes vs composed into one
+(多进程与单进程组合的对比测试).
+
+A driver node publishes synthetic force_sensor and imu/all_data streams and
+measures, for every click edge and motion event it gets back, the time from
+the triggering sample to the reply. CPU time of the stack processes is read
+from /proc over the same interval (Linux only).
+
+    python3 bench_composition.py --duration 30 --rate 200
+    python3 bench_composition.py --nodes force,motion,gui,mqtt   # needs a display and a broker
+
+Both layouts run with min_dwell:=0.0 and filter:=none so a click follows
+its first pressed sample directly.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+import rclpy
+from rclpy.executors import SingleThreadedExecutor
+from rclpy.node import Node
+from rclpy.qos import qos_profile_sensor_data
+from std_msgs.msg import Int32, String
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+STACK_PARAMS = ['--ros-args', '-p', 'force_detector:min_dwell:=0.0', '-p', 'force_detector:filter:=none',
+                '-p', 'motion_detector:features_rate:=0.0']
+
+
+class Driver(Node):
+    def __init__(self, rate):
+        super().__init__('composition_bench_driver')
+        self.force_pub = self.create_publisher(Int32, 'force_sensor', 10)
+        self.imu_pub = self.create_publisher(String, 'imu/all_data', 10)
+        self.create_subscription(String, 'click', self.click_callback, qos_profile_sensor_data)
+        self.create_subscription(String, 'motion/detection', self.motion_callback, qos_profile_sensor_data)
+        self.timer = self.create_timer(1.0 / rate, self.tick)
+        self.start = time.time()
+        self.reset()
+
+    def reset(self):
+        self.click_latency = []
+        self.motion_latency = []
+        self.press_sent = None
+        self.sent = 0
+
+    def tick(self):
+        now = time.time()
+        phase = (now - self.start) % 2.0
+        # Press for 0.2 s of every second (每秒按压0.2秒)
+        pressed = (phase % 1.0) < 0.2
+        if pressed and self.press_sent is None:
+            self.press_sent = now
+        elif not pressed:
+            self.press_sent = None
+        force = Int32()
+        force.data = 30000 if pressed else 1000
+        self.force_pub.publish(force)
+        # Lift for 0.5 s every 2 s (每2秒抬起0.5秒)
+        accel_z = 1.5 if 1.0 <= phase < 1.5 else 1.0
+        imu = String()
+        imu.data = json.dumps({'timestamp': now, 'accel': {'x': 0.0, 'y': 0.0, 'z': accel_z}})
+        self.imu_pub.publish(imu)
+        self.sent += 1
+
+    def click_callback(self, msg):
+        if msg.data == "TRUE" and self.press_sent is not None:
+            self.click_latency.append(time.time() - self.press_sent)
+
+    def motion_callback(self, msg):
+        event = json.loads(msg.data)
+        self.motion_latency.append(time.time() - event['timestamp'])
+
+
+def cpu_seconds(pids):
+    """utime + stime of the given processes (读取/proc中的CPU时间)"""
+    ticks = os.sysconf('SC_CLK_TCK')
+    total = 0.0
+    for pid in pids:
+        with open(f'/proc/{pid}/stat') as f:
+            fields = f.read().rsplit(')', 1)[1].split()
+        total += (int(fields[11]) + int(fields[12])) / ticks
+    return total
+
+
+def launch(layout, nodes):
+    script = os.path.join(HERE, 'glove_stack.py')
+    if layout == 'composed':
+        commands = [[sys.executable, script, '--nodes', ','.join(nodes)]]
+    else:
+        commands = [[sys.executable, script, '--nodes', name, '--no-intra-process'] for name in nodes]
+    return [subprocess.Popen(command + STACK_PARAMS) for command in commands]
+
+
+def spin_for(executor, seconds):
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        executor.spin_once(timeout_sec=0.05)
+
+
+def summarize(samples):
+    if not samples:
+        return 'no samples'
+    ms = np.asarray(samples) * 1e3
+    return (f'n={len(ms):4d}  p50={np.percentile(ms, 50):7.2f} ms  '
+            f'p95={np.percentile(ms, 95):7.2f} ms  max={ms.max():7.2f} ms')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Multi-process vs composed glove stack')
+    parser.add_argument('--nodes', default='force,motion')
+    parser.add_argument('--duration', type=float, default=20.0, help='seconds measured per layout')
+    parser.add_argument('--warmup', type=float, default=5.0)
+    parser.add_argument('--rate', type=float, default=200.0, help='samples/sec on each sensor topic')
+    options = parser.parse_args(argv)
+    nodes = options.nodes.split(',')
+
+    rclpy.init()
+    driver = Driver(options.rate)
+    executor = SingleThreadedExecutor()
+    executor.add_node(driver)
+    try:
+        for layout in ('multi-process', 'composed'):
+            processes = launch(layout, nodes)
+            try:
+                spin_for(executor, options.warmup)
+                driver.reset()
+                cpu_start, wall_start = cpu_seconds(p.pid for p in processes), time.monotonic()
+                spin_for(executor, options.duration)
+                cpu = cpu_seconds(p.pid for p in processes) - cpu_start
+                wall = time.monotonic() - wall_start
+            finally:
+                for process in processes:
+                    process.terminate()
+                for process in processes:
+                    process.wait()
+            print(f'{layout} ({len(processes)} process{"es" if len(processes) > 1 else ""}, '
+                  f'{driver.sent / wall:.0f} samples/s per topic)')
+            print(f'  CPU            : {cpu / wall * 100:6.1f} % of one core')
+            print(f'  force -> click : {summarize(driver.click_latency)}')
+            print(f'  imu -> motion  : {summarize(driver.motion_latency)}')
+    finally:
+        driver.destroy_node()
+        rclpy.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -4,13 +4,34 @@ force_detector.py
 ROS2 订阅者示例：
 监听 "force_sensor" 话题，接收来自 FSR402 的传感器数据，
 并根据力值判断发布“click”话题状态：
-    - 当力值大于 20000 时，发布 "TRUE"
-    - 当力值小于等于 20000 时，发布 "FALSE"
+    - 按压（力值大于 press_threshold）时，发布 "TRUE"
+    - 松开（力值小于等于 release_threshold）时，发布 "FALSE"
+也可以在 "force_sensor_bin" 话题上接收二进制批量帧（见 imu_codec.py）
+
+click_mode 参数：
+    - "edge"（默认）：只在状态变化时发布，新状态需保持 min_dwell 秒；
+      另外每 heartbeat_period 秒发布一次当前状态（0 表示关闭心跳）
+    - "level"：旧行为，每个采样都发布，单一阈值 press_threshold
+
+压力等级（边沿模式下）：
+    每批采样先经过中值或指数滤波（filter 参数："median"/"ema"/"none"），
+    再按 level_names / level_thresholds 分级（默认 light/firm/hard）：
+    - "force/level"：等级变化时发布等级名称（无压力为 "none"）
+    - "force/event"：JSON 事件 {"event", "level", "timestamp"}，
+      event 为 level / press / release / double_press / long_press
+整批采样一次处理（见 force_engine.py），不再逐个采样执行 Python 逻辑。
 """
 
+import json
+import time
+
+import numpy as np
 import rclpy
+from rclpy.logging import LoggingSeverity
 from rclpy.node import Node
-from std_msgs.msg import Int32, String
+from std_msgs.msg import Int32, String, UInt8MultiArray
+from force_engine import ClickDebouncer, ForceEngine, ForceFilter, PressureClassifier
+from imu_codec import decode_force_frame
 
 class ForceDetector(Node):
     def __init__(self):
@@ -24,28 +45,107 @@ class ForceDetector(Node):
         )
         self.subscription  # 防止未使用变量警告
 
+        # 订阅二进制批量帧 'force_sensor_bin'，每帧包含多个采样
+        self.subscription_bin = self.create_subscription(
+            UInt8MultiArray,
+            'force_sensor_bin',
+            self.frame_callback,
+            10
+        )
+
         # 创建发布者，发布 'click' 话题，消息类型为 String
         self.click_pub = self.create_publisher(String, 'click', 10)
+        # 压力等级与派生事件
+        self.level_pub = self.create_publisher(String, 'force/level', 10)
+        self.event_pub = self.create_publisher(String, 'force/event', 10)
         
-        # 设定力的阈值为 20000
-        self.force_threshold = 20000
-        self.get_logger().info(f"Force Detector 已启动，阈值设定为 {self.force_threshold}")
+        # 按压/松开阈值（迟滞）与最短保持时间
+        self.click_mode = self.declare_parameter('click_mode', 'edge').value
+        self.force_threshold = self.declare_parameter('press_threshold', 20000).value
+        min_dwell = self.declare_parameter('min_dwell', 0.05).value
+        self.debouncer = ClickDebouncer(
+            press_threshold=self.force_threshold,
+            release_threshold=self.declare_parameter('release_threshold', 15000).value,
+            min_dwell=min_dwell,
+        )
+
+        # 滤波器与压力分级
+        level_names = self.declare_parameter('level_names', ['light', 'firm', 'hard']).value
+        level_thresholds = self.declare_parameter('level_thresholds', [5000, 20000, 28000]).value
+        self.engine = ForceEngine(
+            force_filter=ForceFilter(
+                kind=self.declare_parameter('filter', 'median').value,
+                window=self.declare_parameter('filter_window', 5).value,
+                alpha=self.declare_parameter('ema_alpha', 0.3).value,
+            ),
+            debouncer=self.debouncer,
+            classifier=PressureClassifier(
+                levels=list(zip(level_names, level_thresholds)),
+                min_dwell=min_dwell,
+                double_press_window=self.declare_parameter('double_press_window', 0.4).value,
+                long_press=self.declare_parameter('long_press', 0.8).value,
+            ),
+        )
+
+        # 边沿模式下的低频心跳，携带当前状态
+        heartbeat_period = self.declare_parameter('heartbeat_period', 1.0).value
+        if self.click_mode == 'edge' and heartbeat_period > 0:
+            self.heartbeat_timer = self.create_timer(heartbeat_period, self.publish_click)
+
+        self.get_logger().info(
+            f"Force Detector 已启动，模式 {self.click_mode}，按压阈值 {self.debouncer.press_threshold}，"
+            f"松开阈值 {self.debouncer.release_threshold}")
 
     def listener_callback(self, msg: Int32):
-        force_value = msg.data
-        self.get_logger().info(f"Force Sensor Data: {force_value}")
-        
-        # 根据力值判断按压状态
-        if force_value > self.force_threshold:
-            click_state = "TRUE"
-        else:
-            click_state = "FALSE"
-            
-        # 发布按压状态到 click 话题
+        # Int32 消息没有时间戳，使用本地单调时钟
+        self.handle_forces(np.array([time.monotonic()]), np.array([msg.data]))
+
+    def frame_callback(self, msg: UInt8MultiArray):
+        try:
+            frame = decode_force_frame(msg.data)
+        except Exception as e:
+            self.get_logger().error(f"解析 force 帧失败: {e}")
+            return
+        self.handle_forces(frame.timestamps, frame.values)
+
+    def handle_forces(self, timestamps, values):
+        # 整批处理采样；调试输出仅在 DEBUG 级别开启时才格式化
+        if self.get_logger().is_enabled_for(LoggingSeverity.DEBUG):
+            self.get_logger().debug(f"Force Sensor Data: {values.tolist()}")
+
+        if self.click_mode == 'level':
+            # 旧行为：根据单一阈值判断并逐个采样发布
+            for pressed in (values > self.force_threshold).tolist():
+                self.publish_click("TRUE" if pressed else "FALSE")
+            return
+
+        # 边沿模式：只在状态变化时发布
+        click_events, force_events = self.engine.process(timestamps, values)
+        for event in click_events:
+            self.get_logger().info(f"click 状态变化: {'TRUE' if event.pressed else 'FALSE'}")
+            self.publish_click("TRUE" if event.pressed else "FALSE")
+        for event in force_events:
+            self.publish_force_event(event)
+
+    def publish_click(self, click_state=None):
+        # 发布按压状态到 click 话题（默认为当前状态）
         click_msg = String()
-        click_msg.data = click_state
+        click_msg.data = self.debouncer.click_state if click_state is None else click_state
         self.click_pub.publish(click_msg)
-        self.get_logger().debug(f"发布 click 状态: {click_state}")
+        if self.get_logger().is_enabled_for(LoggingSeverity.DEBUG):
+            self.get_logger().debug(f"发布 click 状态: {click_msg.data}")
+
+    def publish_force_event(self, event):
+        # 等级变化同时发布到 force/level
+        if event.event == 'level':
+            level_msg = String()
+            level_msg.data = event.level
+            self.level_pub.publish(level_msg)
+        else:
+            self.get_logger().info(f"压力事件: {event.event} ({event.level})")
+        event_msg = String()
+        event_msg.data = json.dumps(event._asdict())
+        self.event_pub.publish(event_msg)
 
 def main(args=None):
     rclpy.init(args=args)
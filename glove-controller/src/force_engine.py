@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+ROS-free force processing for the FSR402 sensor (与ROS无关的压力处理).
+
+Every stage works on whole batches of samples:
+
+1. ForceFilter: median or EMA smoothing, vectorized over the batch
+   (批量中值/指数滤波)
+2. ClickDebouncer: click state with a press/release hysteresis gap and a
+   minimum dwell time (迟滞阈值 + 最短保持时间)
+3. PressureClassifier: pressure levels (light/firm/hard by default) and the
+   press, release, double-press and long-press events derived from them
+   (压力等级及派生事件)
+
+The state machines do not step through samples one at a time; like
+MotionEngine.process_samples they jump straight to the next sample where a
+state change is possible, so the Python work per batch scales with the
+number of transitions, not the number of samples.
+"""
+import math
+from collections import namedtuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+ClickEvent = namedtuple('ClickEvent', ['pressed', 'timestamp'])
+ForceEvent = namedtuple('ForceEvent', ['event', 'level', 'timestamp'])
+
+# (name, lower bound of the filtered force) in increasing order (压力等级及下限)
+DEFAULT_LEVELS = (
+    ('light', 5000),
+    ('firm', 20000),
+    ('hard', 28000),
+)
+NO_PRESSURE = 'none'
+
+
+class ForceFilter:
+    def __init__(self, kind='median', window=5, alpha=0.3):
+        if kind not in ('median', 'ema', 'none'):
+            raise ValueError(f'unknown filter {kind!r}')
+        self.kind = kind
+        self.window = window  # Median window in samples (中值滤波窗口)
+        self.alpha = alpha    # EMA weight of the newest sample (指数滤波系数)
+        self.history = None   # Raw tail for the median, last output for the EMA (跨批次状态)
+        # Longest EMA block whose decay powers stay well inside float range
+        self.ema_block = max(1, int(200 * math.log(10) / -math.log(1.0 - alpha))) if 0 < alpha < 1 else 1
+
+    def apply(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        if not len(values) or self.kind == 'none':
+            return values
+        if self.kind == 'median':
+            return self._median(values)
+        return self._ema(values)
+
+    def _median(self, values):
+        # Pad the very first batch with its first sample (首批用第一个样本填充)
+        if self.history is None:
+            self.history = np.full(self.window - 1, values[0])
+        padded = np.concatenate((self.history, values))
+        self.history = padded[len(padded) - (self.window - 1):]
+        return np.median(sliding_window_view(padded, self.window), axis=-1)
+
+    def _ema(self, values):
+        # y[i] = a * x[i] + (1 - a) * y[i - 1], in closed form per block:
+        # y[i] = d^(i+1) * y[-1] + a * d^i * cumsum(x[j] / d^j)
+        a, d = self.alpha, 1.0 - self.alpha
+        out = np.empty_like(values)
+        last = values[0] if self.history is None else self.history
+        for start in range(0, len(values), self.ema_block):
+            block = values[start:start + self.ema_block]
+            powers = d ** np.arange(len(block) + 1)
+            out[start:start + len(block)] = (powers[1:] * last
+                                             + a * powers[:-1] * np.cumsum(block / powers[:-1]))
+            last = out[start + len(block) - 1]
+        self.history = last
+        return out
+
+
+class DwellFilter:
+    """
+    Discrete state that only changes once a different candidate value has
+    held for `min_dwell` seconds (新值保持足够时间后才切换状态)
+    """
+
+    def __init__(self, initial, min_dwell):
+        self.state = initial
+        self.min_dwell = min_dwell
+        self.pending = None         # Candidate waiting to be confirmed (等待确认的候选值)
+        self.pending_since = None
+
+    def update(self, timestamp, candidate):
+        """Feed one sample's candidate; returns True if the state changed"""
+        if candidate == self.state:
+            self.pending = self.pending_since = None
+            return False
+        if candidate != self.pending:
+            self.pending, self.pending_since = candidate, timestamp
+        if timestamp - self.pending_since < self.min_dwell:
+            return False
+        self.state = candidate
+        self.pending = self.pending_since = None
+        return True
+
+    def next_change(self, timestamps, candidates):
+        """
+        Index of the first sample at which `update` would change the state,
+        or None; pending state is carried over when there is none. Same
+        result as calling `update` for every sample, in one pass
+        """
+        n = len(candidates)
+        index = np.arange(n)
+        run_start = np.empty(n, dtype=bool)
+        run_start[0] = True
+        run_start[1:] = candidates[1:] != candidates[:-1]
+        start_index = np.maximum.accumulate(np.where(run_start, index, 0))
+        start_time = timestamps[start_index]
+        if self.pending is not None and candidates[0] == self.pending:
+            # The first run began in an earlier batch (首段始于之前的批次)
+            start_time = np.where(start_index == 0, self.pending_since, start_time)
+        differs = candidates != self.state
+        hits = np.flatnonzero(differs & (timestamps - start_time >= self.min_dwell))
+        if len(hits):
+            j = int(hits[0])
+            self.state = candidates[j].item()
+            self.pending = self.pending_since = None
+            return j
+        if differs[-1]:
+            self.pending, self.pending_since = candidates[-1].item(), float(start_time[-1])
+        else:
+            self.pending = self.pending_since = None
+        return None
+
+
+class ClickDebouncer:
+    def __init__(self, press_threshold=20000, release_threshold=15000, min_dwell=0.05):
+        if release_threshold > press_threshold:
+            raise ValueError('release_threshold must not exceed press_threshold')
+        self.press_threshold = press_threshold
+        self.release_threshold = release_threshold
+        self.dwell = DwellFilter(False, min_dwell)
+
+    @property
+    def pressed(self):
+        return self.dwell.state
+
+    @property
+    def click_state(self):
+        return "TRUE" if self.pressed else "FALSE"
+
+    def _threshold(self):
+        # Pressed: stay pressed above the release threshold (迟滞：按下后以松开阈值判断)
+        return self.release_threshold if self.pressed else self.press_threshold
+
+    def update(self, timestamp, force_value):
+        """Feed one sample; returns a ClickEvent on a state change, else None (输入单个样本)"""
+        if self.dwell.update(timestamp, force_value > self._threshold()):
+            return ClickEvent(self.pressed, timestamp)
+        return None
+
+    def process(self, timestamps, values):
+        """Feed a batch; returns the ClickEvents it triggers (批量处理)"""
+        events = []
+        i = 0
+        while i < len(values):
+            j = self.dwell.next_change(timestamps[i:], values[i:] > self._threshold())
+            if j is None:
+                break
+            i += j
+            events.append(ClickEvent(self.pressed, float(timestamps[i])))
+            i += 1
+        return events
+
+
+class PressureClassifier:
+    def __init__(self, levels=DEFAULT_LEVELS, min_dwell=0.05, double_press_window=0.4, long_press=0.8):
+        self.names = (NO_PRESSURE,) + tuple(name for name, _ in levels)
+        self.bounds = np.array([bound for _, bound in levels], dtype=np.float64)
+        if np.any(np.diff(self.bounds) <= 0):
+            raise ValueError('pressure levels must have increasing bounds')
+        self.dwell = DwellFilter(0, min_dwell)
+        self.double_press_window = double_press_window  # Max gap between two presses (双击最大间隔)
+        self.long_press = long_press                    # Hold time for a long press (长按时间)
+        self.press_start = None
+        self.long_reported = False
+        self.last_release = None
+
+    @property
+    def level(self):
+        return self.names[self.dwell.state]
+
+    def classify(self, values):
+        """Level index per sample, 0 meaning no pressure (每个样本的压力等级)"""
+        return np.searchsorted(self.bounds, values, side='right')
+
+    def process(self, timestamps, values):
+        """Feed a batch of filtered force values; returns ForceEvents (批量处理)"""
+        events = []
+        candidates = self.classify(values)
+        i = 0
+        while i < len(values):
+            level = self.level
+            j = self.dwell.next_change(timestamps[i:], candidates[i:])
+            end = len(values) if j is None else i + j
+            # The press still holds on the sample that changes the level,
+            # so that sample counts towards the long press (电平变化的样本也计入长按)
+            self._check_long_press(timestamps[i:end + 1], level, events)
+            if j is None:
+                break
+            self._on_level_change(float(timestamps[end]), events)
+            i = end + 1
+        return events
+
+    def _check_long_press(self, timestamps, level, events):
+        # First sample of the span at which the press has lasted long enough (长按检测)
+        if self.press_start is None or self.long_reported or not len(timestamps):
+            return
+        k = np.searchsorted(timestamps, self.press_start + self.long_press)
+        if k < len(timestamps):
+            self.long_reported = True
+            events.append(ForceEvent('long_press', level, float(timestamps[k])))
+
+    def _on_level_change(self, timestamp, events):
+        level = self.level
+        events.append(ForceEvent('level', level, timestamp))
+        if self.press_start is None and level != NO_PRESSURE:
+            self.press_start, self.long_reported = timestamp, False
+            events.append(ForceEvent('press', level, timestamp))
+            if self.last_release is not None and timestamp - self.last_release <= self.double_press_window:
+                events.append(ForceEvent('double_press', level, timestamp))
+                self.last_release = None  # A third press starts a new pair (第三次按压重新计数)
+        elif self.press_start is not None and level == NO_PRESSURE:
+            # Long presses never count towards a double press (长按不计入双击)
+            self.last_release = None if self.long_reported else timestamp
+            self.press_start = None
+            events.append(ForceEvent('release', level, timestamp))
+
+
+class ForceEngine:
+    """Filter, click debouncing and pressure classification in one pass per batch"""
+
+    def __init__(self, force_filter=None, debouncer=None, classifier=None):
+        self.filter = ForceFilter() if force_filter is None else force_filter
+        self.debouncer = ClickDebouncer() if debouncer is None else debouncer
+        self.classifier = PressureClassifier() if classifier is None else classifier
+
+    def process(self, timestamps, values):
+        """Returns (click events, force events) for a batch (返回按压事件与压力事件)"""
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        filtered = self.filter.apply(values)
+        return (self.debouncer.process(timestamps, filtered),
+                self.classifier.process(timestamps, filtered))
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+In-process IMU frame bus: decode every incoming frame once, let any number
+of detectors read it (一次解码，多个检测器共享).
+
+Frames are decoded into a columnar ring, one row per signal:
+    columns[0]      sample timestamps
+    columns[1 + k]  channel k of IMU_CHANNELS (zero when the frame lacks it)
+
+The ring is mirrored - every sample is written at `i` and `i + capacity` -
+so the newest `n <= capacity` samples are always one contiguous slice and
+consumers get plain NumPy views, never copies (镜像环形缓冲，读取零拷贝).
+Views are only valid until the ring wraps over them; a consumer that keeps
+data across calls has to copy it.
+
+Each consumer has its own read cursor. Push consumers are called from
+`dispatch` with everything new; pull consumers call `read` at their own
+pace. If a consumer falls more than `capacity` samples behind, the oldest
+samples are skipped and counted as dropped; `lag_report` shows who is
+falling behind.
+
+Run this file directly to compare one shared decode against a parse per
+consumer.
+"""
+import time
+
+import numpy as np
+
+from imu_codec import IMU_CHANNELS, decode_imu_payload
+
+
+class BusConsumer:
+    def __init__(self, name, callback, cursor):
+        self.name = name
+        self.callback = callback  # None for pull consumers (拉取式消费者为None)
+        self.cursor = cursor      # Bus count up to which samples were read (读取游标)
+        self.samples = 0          # Samples delivered (已交付样本数)
+        self.dropped = 0          # Samples skipped after falling behind (落后被跳过的样本数)
+        self.calls = 0
+        self.busy = 0.0           # Seconds spent in the callback (回调耗时)
+        self.max_lag = 0
+
+
+class FrameBus:
+    def __init__(self, capacity=8192, channels=IMU_CHANNELS):
+        self.capacity = capacity
+        self.channels = tuple(channels)
+        self.columns = np.zeros((1 + len(self.channels), 2 * capacity), dtype=np.float64)
+        self.count = 0        # Total samples ever written (累计写入的样本数)
+        self.n_channels = 0   # Channels carried by the latest frame (最新帧的通道数)
+        self.frames = 0
+        self.consumers = []
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def register(self, name, callback=None):
+        """
+        Add a consumer reading from now on. `callback(block)` is called by
+        `dispatch` with a (1 + channels, n) view of the new samples; without
+        a callback the consumer polls with `read` (注册消费者)
+        """
+        consumer = BusConsumer(name, callback, self.count)
+        self.consumers.append(consumer)
+        return consumer
+
+    def publish(self, payload):
+        """Decode one imu/all_data message (JSON or binary), store it and dispatch (解码、写入并分发)"""
+        frame = decode_imu_payload(payload)
+        self.write(frame.timestamps, frame.values)
+        self.dispatch()
+        return len(frame.timestamps)
+
+    def write(self, timestamps, values):
+        """Store N samples; `values` has shape (N, C) with C <= len(channels)"""
+        n, width = values.shape
+        if n > self.capacity:
+            timestamps, values = timestamps[-self.capacity:], values[-self.capacity:]
+            self.count += n - self.capacity
+            n = self.capacity
+        capacity = self.capacity
+        start = self.count % capacity
+        first = min(n, capacity - start)
+        for offset, lo, hi in ((start, 0, first), (0, first, n)):
+            if lo == hi:
+                continue
+            for base in (offset, offset + capacity):
+                target = self.columns[:, base:base + hi - lo]
+                target[0] = timestamps[lo:hi]
+                target[1:1 + width] = values[lo:hi].T
+                target[1 + width:] = 0.0
+        self.count += n
+        self.n_channels = width
+        self.frames += 1
+
+    def view(self, n, end=None):
+        """(1 + channels, n) view of the `n` samples before `end` (default: newest)"""
+        end = self.count if end is None else end
+        start = (end - n) % self.capacity
+        return self.columns[:, start:start + n]
+
+    def latest(self, n=None):
+        """
+        Last `n` samples as rows [timestamp, ch0, ...], oldest first - a
+        transposed view, same layout as ImuRingBuffer.latest (按行返回最新样本)
+        """
+        held = len(self)
+        n = held if n is None else min(n, held)
+        return self.view(n).T
+
+    def read(self, consumer, history=0):
+        """
+        Samples `consumer` has not seen yet, preceded by up to `history`
+        already-seen samples, as a (1 + channels, n) view; None if nothing is new
+        """
+        lag = self.count - consumer.cursor
+        consumer.max_lag = max(consumer.max_lag, lag)
+        if lag > self.capacity:
+            consumer.dropped += lag - self.capacity
+            lag = self.capacity
+        if lag == 0:
+            return None
+        consumer.cursor = self.count
+        consumer.samples += lag
+        return self.view(min(lag + history, len(self)))
+
+    def dispatch(self):
+        """Hand new samples to every push consumer (分发给推送式消费者)"""
+        for consumer in self.consumers:
+            if consumer.callback is None:
+                continue
+            block = self.read(consumer)
+            if block is None:
+                continue
+            start = time.perf_counter()
+            consumer.callback(block)
+            consumer.busy += time.perf_counter() - start
+            consumer.calls += 1
+
+    def lag_report(self, reset=True):
+        """
+        Per-consumer lag, drops and throughput since the last report
+        (各消费者的延迟与吞吐统计); `max_lag` and `dropped` are in samples
+        """
+        report = {}
+        for consumer in self.consumers:
+            lag = self.count - consumer.cursor
+            report[consumer.name] = {
+                'lag': lag,
+                'max_lag': max(consumer.max_lag, lag),
+                'dropped': consumer.dropped,
+                'samples': consumer.samples,
+                'calls': consumer.calls,
+                'busy_ms': round(consumer.busy * 1e3, 3),
+            }
+            if reset:
+                consumer.max_lag = lag
+                consumer.samples = consumer.calls = consumer.dropped = 0
+                consumer.busy = 0.0
+        return report
+
+
+def _benchmark(n_messages=2000, batch=10, n_consumers=4):
+    import json
+
+    rng = np.random.default_rng(0)
+    messages = []
+    for k in range(n_messages):
+        t = (k * batch + np.arange(batch)) * 0.001
+        values = rng.normal(0, 1, (batch, 9))
+        messages.append(json.dumps({
+            'timestamp': t.tolist(),
+            **{g: {a: values[:, 3 * i + j].tolist() for j, a in enumerate('xyz')}
+               for i, g in enumerate(('accel', 'gyro', 'mag'))},
+        }))
+
+    start = time.perf_counter()
+    for message in messages:
+        for _ in range(n_consumers):
+            decode_imu_payload(message)
+    separate = time.perf_counter() - start
+
+    bus = FrameBus()
+    for k in range(n_consumers):
+        bus.register(f'consumer{k}', lambda block: block[1:4].T)
+    start = time.perf_counter()
+    for message in messages:
+        bus.publish(message)
+    shared = time.perf_counter() - start
+
+    print(f'{n_consumers} consumers, {n_messages} messages of {batch} samples')
+    print(f'  parse per consumer: {separate / n_messages * 1e6:8.1f} us/message')
+    print(f'  shared frame bus  : {shared / n_messages * 1e6:8.1f} us/message')
+    print(f'  lag report        : {bus.lag_report()}')
+
+
+if __name__ == '__main__':
+    _benchmark()
@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Gesture recognition for the glove IMU by dynamic time warping (DTW).
+
+Recorded gesture templates are resampled to a common length and z-normalized
+per axis. Every `hop` samples the latest multi-axis window is matched against
+the whole library:
+
+1. LB_Keogh lower bounds against every template's warping envelope, computed
+   for all templates in one NumPy expression (所有模板一次性计算下界)
+2. Templates are visited in order of increasing lower bound; the search stops
+   as soon as a bound exceeds the best distance found so far (下界剪枝)
+3. DTW runs for a small batch of candidates at a time, row by row inside a
+   Sakoe-Chiba band; a candidate is abandoned once its whole row exceeds
+   the best distance (批量计算并提前放弃)
+
+Library file (JSON): {"wave": [[ax, ay, az], ...], "circle": [[...], ...]}
+
+Run this file directly to benchmark matches/sec against template count.
+"""
+import json
+from collections import namedtuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+GestureMatch = namedtuple('GestureMatch', ['gesture', 'distance', 'timestamp'])
+
+
+def resample(samples, length):
+    """Linearly resample (N, C) samples to (length, C) (线性重采样)"""
+    samples = np.asarray(samples, dtype=np.float64)
+    source = np.linspace(0.0, 1.0, len(samples))
+    target = np.linspace(0.0, 1.0, length)
+    return np.column_stack([np.interp(target, source, samples[:, c]) for c in range(samples.shape[1])])
+
+
+def znormalize(samples):
+    """Zero mean, unit variance per axis (按轴标准化)"""
+    std = samples.std(axis=0)
+    return (samples - samples.mean(axis=0)) / np.maximum(std, 1e-3)
+
+
+def envelopes(templates, radius):
+    """Upper/lower LB_Keogh envelopes of (T, L, C) templates (计算上下包络)"""
+    padded = np.pad(templates, ((0, 0), (radius, radius), (0, 0)), mode='edge')
+    windows = sliding_window_view(padded, 2 * radius + 1, axis=1)
+    return windows.max(axis=-1), windows.min(axis=-1)
+
+
+def lb_keogh(query, upper, lower):
+    """LB_Keogh of one (L, C) query against (T, L, C) envelopes -> (T,)"""
+    above = np.maximum(query - upper, 0.0)
+    below = np.maximum(lower - query, 0.0)
+    return (above * above + below * below).sum(axis=(1, 2))
+
+
+def dtw_distances(query, templates, radius, best=np.inf, check_every=4):
+    """
+    Banded DTW of one (L, C) query against (K, L, C) templates, with squared
+    Euclidean point cost (带约束带的批量DTW)
+
+    Candidates are evaluated together, one warping-matrix row at a time.
+    Every `check_every` rows, a candidate whose whole row reaches `best` is
+    abandoned and reported as np.inf; the loop stops early once every
+    candidate has been abandoned.
+    """
+    add_accumulate = np.add.accumulate
+    min_accumulate = np.minimum.accumulate
+    min_reduce = np.minimum.reduce
+
+    n_templates, length = len(templates), len(query)
+    diff = query[None, :, None, :] - templates[:, None, :, :]
+    cost = np.einsum('kijc,kijc->kij', diff, diff)
+    # prev[:, j + 1] = D[i - 1, j]; column 0 stays inf (左侧边界)
+    prev = np.full((n_templates, length + 1), np.inf)
+    alive = np.ones(n_templates, dtype=bool)
+    for i in range(length):
+        lo, hi = max(0, i - radius), min(length, i + radius + 1)
+        c = cost[:, i, lo:hi]
+        csum = add_accumulate(c, axis=1)
+        if i == 0:
+            row = csum
+        else:
+            # D[i, j] = c + min(D[i-1, j-1], D[i-1, j], D[i, j-1]); the horizontal
+            # term is a prefix scan: min_k(t_k - C_k) + C_j with C = cumsum(c)
+            vertical = c + np.minimum(prev[:, lo:hi], prev[:, lo + 1:hi + 1])
+            row = min_accumulate(vertical - csum, axis=1) + csum
+        prev[:, lo + 1:hi + 1] = row
+        if i % check_every == check_every - 1:
+            alive &= min_reduce(row, axis=1) < best
+            if not alive.any():
+                break  # Early abandon (提前放弃)
+    return np.where(alive, prev[:, length], np.inf)
+
+
+def dtw_distance(query, template, radius, best=np.inf):
+    """Banded DTW between two (L, C) sequences; np.inf once it provably reaches `best`"""
+    return float(dtw_distances(query, template[None], radius, best)[0])
+
+
+class GestureLibrary:
+    def __init__(self, length=32, radius=None):
+        self.length = length
+        self.radius = max(1, length // 10) if radius is None else radius
+        self.names = []
+        self.templates = np.zeros((0, length, 0))
+        self.upper = self.lower = self.templates
+
+    @classmethod
+    def load(cls, path, length=32, radius=None):
+        with open(path, 'r') as f:
+            raw = json.load(f)
+        library = cls(length, radius)
+        for name, samples in raw.items():
+            library.add(name, samples)
+        return library
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump({name: template.tolist() for name, template in zip(self.names, self.templates)}, f)
+
+    def __len__(self):
+        return len(self.names)
+
+    def add(self, name, samples):
+        """Add a recorded (N, C) gesture under `name` (添加手势模板)"""
+        template = znormalize(resample(samples, self.length))
+        templates = template[None] if not len(self) else np.concatenate((self.templates, template[None]))
+        self.names.append(name)
+        self.templates = templates
+        self.upper, self.lower = envelopes(self.templates, self.radius)
+
+
+class GestureMatcher:
+    def __init__(self, library, window=50, hop=10, threshold=1.0, refractory=0.5, chunk=8):
+        self.library = library
+        self.window = window          # Samples per query window (查询窗口样本数)
+        self.hop = hop                # Samples between evaluations (评估间隔样本数)
+        self.threshold = threshold    # Max DTW distance per point for a match (匹配阈值)
+        self.refractory = refractory  # Seconds before the same gesture may fire again (不应期)
+        self.chunk = chunk            # Templates per batched DTW (每批DTW的模板数)
+        self.last_count = 0
+        self.last_match = {}
+        self.stats = {'queries': 0, 'dtw': 0, 'pruned': 0}
+
+    def match(self, samples):
+        """
+        Best template for an (N, C) window, as (name, distance per point),
+        or None if nothing is under the threshold
+        """
+        library = self.library
+        if not len(library):
+            return None
+        query = znormalize(resample(samples, library.length))
+        bounds = lb_keogh(query, library.upper, library.lower)
+        best = self.threshold * library.length
+        best_index = None
+        self.stats['queries'] += 1
+        order = np.argsort(bounds)
+        computed = 0
+        # Visit templates by increasing lower bound: the most promising one
+        # alone to tighten `best` quickly, then a few at a time
+        # (按下界从小到大分批计算)
+        position, size = 0, 1
+        while position < len(order):
+            candidates = order[position:position + size]
+            position, size = position + size, self.chunk
+            candidates = candidates[bounds[candidates] < best]
+            if not len(candidates):
+                break
+            computed += len(candidates)
+            distances = dtw_distances(query, library.templates[candidates], library.radius, best)
+            winner = int(np.argmin(distances))
+            if distances[winner] < best:
+                best, best_index = float(distances[winner]), int(candidates[winner])
+        self.stats['dtw'] += computed
+        self.stats['pruned'] += len(bounds) - computed
+        if best_index is None:
+            return None
+        return library.names[best_index], best / library.length
+
+    def update(self, imu_buffer):
+        """
+        Match the newest window once `hop` new samples have arrived
+        (新样本达到hop个时进行一次匹配); returns a GestureMatch or None
+        """
+        if imu_buffer.count - self.last_count < self.hop or len(imu_buffer) < self.window:
+            return None
+        self.last_count = imu_buffer.count
+        samples = imu_buffer.latest(self.window)
+        result = self.match(samples[:, 1:4])
+        if result is None:
+            return None
+        name, distance = result
+        timestamp = float(samples[-1, 0])
+        if timestamp - self.last_match.get(name, -np.inf) < self.refractory:
+            return None
+        self.last_match[name] = timestamp
+        return GestureMatch(name, distance, timestamp)
+
+
+def _benchmark(counts=(10, 50, 100, 250, 500), queries=200):
+    import time
+
+    rng = np.random.default_rng(0)
+    t = np.linspace(0, 2 * np.pi, 60)
+    base = np.column_stack((np.sin(t), np.cos(2 * t), np.sin(3 * t)))
+    print(f'{"templates":>9} {"matches/s":>10} {"us/match":>9} {"dtw/match":>10}')
+    for count in counts:
+        library = GestureLibrary()
+        for k in range(count):
+            phase = rng.uniform(0, 2 * np.pi, 3)
+            library.add(f'g{k}', np.sin(t[:, None] * rng.integers(1, 4, 3) + phase))
+        library.add('target', base)
+        matcher = GestureMatcher(library, threshold=0.5)
+        windows = [base * rng.uniform(0.8, 1.2) + rng.normal(0, 0.1, base.shape) for _ in range(queries)]
+        start = time.perf_counter()
+        for window in windows:
+            matcher.match(window)
+        elapsed = time.perf_counter() - start
+        print(f'{count + 1:9d} {queries / elapsed:10.0f} {elapsed / queries * 1e6:9.1f} '
+              f'{matcher.stats["dtw"] / queries:10.2f}')
+
+
+if __name__ == '__main__':
+    _benchmark()
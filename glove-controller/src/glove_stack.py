@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Composed launch of the glove stack: force_detector, mpu_detector, gui and
+mqtt as nodes of one process sharing one executor, instead of four
+processes with four rclpy contexts (单进程组合启动).
+
+click, motion/detection and GUI are handed between the nodes in-process
+(see intra_process.py); the imu/* and force_sensor* streams use the
+sensor-data QoS profile, state and event topics stay reliable.
+The motion detector runs without its live plot - the main thread belongs to
+the GUI window. With --headless there is no window either, tkinter and
+matplotlib are never imported, and the GUI node still publishes its
+aggregated state.
+
+    python3 glove_stack.py                              # all four nodes
+    python3 glove_stack.py --nodes force,motion         # a subset
+    python3 glove_stack.py --no-intra-process           # one executor, DDS between nodes
+    python3 glove_stack.py --headless                   # no window
+    python3 glove_stack.py --ros-args -p force_detector:min_dwell:=0.02
+
+A plain `-p name:=value` applies to every node in the process, and some
+names mean different things in different nodes (heartbeat_period is 1 s
+for force_detector's click, 5 s for the GUI state), so prefix parameters
+with the node name: force_detector, motion_detector, click_listener
+(gui) or gui_subscriber (mqtt).
+"""
+import argparse
+import sys
+import threading
+
+import rclpy
+from rclpy.executors import SingleThreadedExecutor
+from rclpy.utilities import remove_ros_args
+
+from intra_process import LOCAL_TOPICS, IntraProcessRouter, composed
+
+NODES = ('force', 'motion', 'gui', 'mqtt')
+
+
+def parse_args(argv=None):
+    argv = sys.argv if argv is None else argv
+    parser = argparse.ArgumentParser(description='Glove nodes composed into one process')
+    parser.add_argument('--nodes', default=','.join(NODES),
+                        help=f'comma-separated subset of {", ".join(NODES)}')
+    parser.add_argument('--no-intra-process', action='store_true',
+                        help='keep one executor but route every topic through DDS')
+    parser.add_argument('--headless', action='store_true',
+                        help='no GUI window; the GUI node still publishes its state')
+    options = parser.parse_args(remove_ros_args(argv)[1:])
+    options.nodes = [name.strip() for name in options.nodes.split(',') if name.strip()]
+    unknown = set(options.nodes) - set(NODES)
+    if unknown:
+        parser.error(f'unknown nodes: {", ".join(sorted(unknown))}')
+    return options
+
+
+def create_nodes(names, router):
+    """Instantiate the selected nodes; GUI and MQTT modules are only imported when used"""
+    nodes = {}
+    if 'force' in names:
+        from force_detector import ForceDetector
+        nodes['force'] = composed(ForceDetector, router)()
+    if 'motion' in names:
+        from mpu_detector import MotionDetector
+        nodes['motion'] = composed(MotionDetector, router)()
+    if 'gui' in names:
+        from gui import ClickListener
+        nodes['gui'] = composed(ClickListener, router)()
+    if 'mqtt' in names:
+        from mqtt import GuiSubscriber
+        nodes['mqtt'] = composed(GuiSubscriber, router)()
+    return nodes
+
+
+def main(args=None):
+    options = parse_args(args)
+    rclpy.init(args=args)
+
+    router = IntraProcessRouter(local_topics=() if options.no_intra_process else LOCAL_TOPICS)
+    nodes = create_nodes(options.nodes, router)
+    executor = SingleThreadedExecutor()
+    for node in nodes.values():
+        executor.add_node(node)
+
+    window = 'gui' in nodes and not options.headless
+    if 'gui' in nodes and options.headless:
+        nodes['gui'].auto_drain = True
+        nodes['gui'].drain_updates()
+
+    mqtt_thread = None
+    try:
+        if not window and 'mqtt' not in nodes:
+            executor.spin()
+            return
+        # Blocking front ends: the window needs the main thread (窗口需要主线程)
+        threading.Thread(target=executor.spin, daemon=True).start()
+        if 'mqtt' in nodes:
+            import mqtt
+            mqtt.load_preferences()
+            if not window:
+                mqtt.run_mqtt(nodes['mqtt'])
+                return
+            mqtt_thread = threading.Thread(target=mqtt.run_mqtt, args=(nodes['mqtt'],), daemon=True)
+            mqtt_thread.start()
+        import gui
+        gui.run_window(nodes['gui'])
+    except KeyboardInterrupt:
+        print("User interrupted, shutting down...")
+    finally:
+        if mqtt_thread is not None:
+            # Let the bridge publish its pending batches and close the outbox
+            # before the process exits (窗口关闭后先停止MQTT桥接)
+            mqtt.stop_mqtt(nodes['mqtt'])
+            mqtt_thread.join()
+        executor.shutdown()
+        for node in nodes.values():
+            node.destroy_node()
+        rclpy.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -3,15 +3,60 @@
 ROS2 Subscriber + GUI Example:
 Subscribe to "click" and "motion/detection" topics, and display both states simultaneously.
 Additional: Add a channel switch button to the GUI, and publish the current GUI state to the "GUI" topic when the state is updated
+
+ROS callbacks never touch the widgets or the state directly: they queue state
+deltas, and the Tk loop drains the queue. Labels are reconfigured and "GUI"
+is published only when the derived state changes, plus a slow heartbeat
+for late subscribers (状态变化时才刷新界面并发布).
+
+With --headless there is no window and tkinter is never imported; the same
+state is still derived and published on "GUI" (无界面模式仍发布状态).
 """
 
+import argparse
+import sys
 import rclpy
 from rclpy.node import Node
+from rclpy.utilities import remove_ros_args
 from std_msgs.msg import String
-import tkinter as tk
+import queue
 import threading
 import json
 
+# How often the Tk loop looks for queued deltas (Tk循环检查队列的间隔)
+POLL_MS = 100
+
+# Label text and colour for each published value
+CLICK_DISPLAY = {
+    "pressed": ("Pressed", "red"),
+    "not_pressed": ("Not Pressed", "green"),
+}
+MOTION_DISPLAY = {
+    "lifting": ("LIFTING", "red"),
+    "dropping": ("DROPPING", "blue"),
+    "stationary": ("STATIONARY", "yellow"),
+    "error": ("UNKNOWN", "grey"),
+}
+
+def derive_gui_state(click_state, motion_state, channel):
+    """Aggregated state published on "GUI" (由原始状态得出要发布的状态)"""
+    publish_click = "pressed" if click_state == "TRUE" else "not_pressed"
+
+    if motion_state in ["LIFT_START", "LIFT_COMPLETE"]:
+        publish_motion = "lifting"
+    elif motion_state in ["DROP_START", "DROP_COMPLETE"]:
+        publish_motion = "dropping"
+    elif motion_state == "STATIONARY":
+        publish_motion = "stationary"
+    else:
+        publish_motion = "error"
+
+    return {
+        "click": publish_click,
+        "motion": publish_motion,
+        "channel": str(channel)
+    }
+
 class ClickListener(Node):
     def __init__(self):
         super().__init__('click_listener')
@@ -32,35 +77,113 @@ class ClickListener(Node):
             10
         )
         
+        # Owned by the thread that calls drain_updates (只由处理队列的线程修改)
         self.click_state = "FALSE"      # DEFAULT PRESS STATUS
         self.motion_state = "STATIONARY" # DEFAULT MOTION STATUS
 
         self.channel = 1  # DEFAULT CHANNEL 1
 
+        # (field, value) deltas from the ROS callbacks (来自ROS回调的状态增量)
+        self.updates = queue.SimpleQueue()
+        self.gui_state = None  # Last published GUI state
+        # Headless: callbacks drain the queue themselves (无界面时由回调直接处理队列)
+        self.auto_drain = False
+
         # Create a publisher to publish GUI status messages for use by MQTT
         self.publisher_gui = self.create_publisher(String, 'GUI', 10)
         
+        # Republish the unchanged state now and then for late subscribers; 0 disables
+        heartbeat_period = self.declare_parameter('heartbeat_period', 5.0).value
+        if heartbeat_period > 0:
+            self.heartbeat_timer = self.create_timer(heartbeat_period, self.publish_gui_state)
+
     def click_callback(self, msg: String):
-        self.click_state = msg.data
-        self.get_logger().info(f"RECEIVE CLICK STATE: {self.click_state}")
+        self.updates.put(("click_state", msg.data))
+        self.get_logger().info(f"RECEIVE CLICK STATE: {msg.data}")
+        if self.auto_drain:
+            self.drain_updates()
 
     def motion_callback(self, msg: String):
-        self.motion_state = msg.data
-        self.get_logger().info(f"RECEIVE MOTION STATE: {self.motion_state}")
+        # Detection events are JSON carrying the triggering sample timestamp;
+        # plain state strings are still accepted
+        if msg.data.startswith('{'):
+            try:
+                event = json.loads(msg.data)
+            except ValueError as e:
+                # A bad payload must not raise out of the ROS callback (不能让异常中断ROS回调)
+                self.get_logger().error(f"Invalid motion event {msg.data!r}: {e}")
+                return
+            if 'gesture' in event:
+                # Gestures arrive alongside the lift/drop states and do not replace them
+                self.get_logger().info(f"RECEIVE GESTURE: {event['gesture']}")
+                return
+            motion_state = event.get('motion', 'UNKNOWN')
+        else:
+            motion_state = msg.data
+        self.updates.put(("motion_state", motion_state))
+        self.get_logger().info(f"RECEIVE MOTION STATE: {motion_state}")
+        if self.auto_drain:
+            self.drain_updates()
+
+    def switch_channel(self):
+        # 按顺序切换：1 -> 2 -> 3 -> 1（在处理队列的线程中调用）
+        self.channel = self.channel % 3 + 1
+        self.get_logger().info(f"Channel switched to: {self.channel}")
+
+    def drain_updates(self):
+        """
+        Apply every queued delta; if the derived state changed, publish it on
+        "GUI" and return it, otherwise return None (处理队列中的状态增量)
+        """
+        while True:
+            try:
+                field, value = self.updates.get_nowait()
+            except queue.Empty:
+                break
+            setattr(self, field, value)
+
+        state = derive_gui_state(self.click_state, self.motion_state, self.channel)
+        if state == self.gui_state:
+            return None
+        self.gui_state = state
+        self.publish_gui_state()
+        return state
+
+    def publish_gui_state(self):
+        state = self.gui_state
+        if state is None:
+            return
+        msg = String()
+        msg.data = json.dumps(state)
+        self.publisher_gui.publish(msg)
 
 def ros_spin(node):
     rclpy.spin(node)
 
-def main():
-    # initialize ROS2 node
-    rclpy.init()
-    click_listener = ClickListener()
-    
-    # Run ROS2 spin in a separate thread to avoid blocking the GUI main loop
-    # (单独线程运行 ROS2 spin，避免阻塞 GUI 主循环)
-    ros_thread = threading.Thread(target=ros_spin, args=(click_listener,), daemon=True)
-    ros_thread.start()
-    
+def parse_args(argv=None):
+    argv = sys.argv if argv is None else argv
+    parser = argparse.ArgumentParser(description='Click & motion state GUI')
+    parser.add_argument('--headless', action='store_true',
+                        help='no window; only derive and publish the GUI state')
+    return parser.parse_args(remove_ros_args(argv)[1:])
+
+def run_headless(click_listener):
+    """Publish the derived state from the ROS thread, no window (无界面运行)"""
+    click_listener.auto_drain = True
+    click_listener.drain_updates()  # 发布初始状态
+    try:
+        rclpy.spin(click_listener)
+    except KeyboardInterrupt:
+        print("User interrupted, shutting down...")
+    finally:
+        click_listener.destroy_node()
+        rclpy.shutdown()
+
+def run_window(click_listener):
+    """Show the state window in the calling (main) thread until it is closed"""
+    # Tk is only needed with a window (仅在有窗口时导入Tk)
+    import tkinter as tk
+
     # create Tkinter GUI window
     root = tk.Tk()
     root.title("Click & Motion State Detector")
@@ -73,62 +196,48 @@ def main():
     label_motion = tk.Label(root, text="STATIONARY", font=("Arial", 32), width=20, height=3, bg="yellow")
     label_motion.pack(padx=20, pady=10)
     
+    def refresh():
+        # 只有状态变化时才重新配置控件
+        state = click_listener.drain_updates()
+        if state is None:
+            return
+        text, color = CLICK_DISPLAY[state["click"]]
+        label_click.config(text=text, bg=color)
+        text, color = MOTION_DISPLAY[state["motion"]]
+        label_motion.config(text=text, bg=color)
+        btn_channel.config(text=f"Channel: {state['channel']}")
+
     # add channel switch module: 1, 2, 3
     def switch_channel():
-        # 按顺序切换：1 -> 2 -> 3 -> 1
-        if click_listener.channel == 1:
-            click_listener.channel = 2
-        elif click_listener.channel == 2:
-            click_listener.channel = 3
-        else:
-            click_listener.channel = 1
-        btn_channel.config(text=f"Channel: {click_listener.channel}")
-        click_listener.get_logger().info(f"Channel switched to: {click_listener.channel}")
+        click_listener.switch_channel()
+        refresh()  # 按钮立即生效
 
     btn_channel = tk.Button(root, text=f"Channel: {click_listener.channel}", font=("Arial", 24), command=switch_channel)
     btn_channel.pack(padx=20, pady=10)
     
-    def update_labels():
-        # update press status
-        if click_listener.click_state == "TRUE":
-            label_click.config(text="Pressed", bg="red")
-            publish_click = "pressed"
-        else:
-            label_click.config(text="Not Pressed", bg="green")
-            publish_click = "not_pressed"
-
-        # update motion status
-        if click_listener.motion_state in ["LIFT_START", "LIFT_COMPLETE"]:
-            label_motion.config(text="LIFTING", bg="red")
-            publish_motion = "lifting"
-        elif click_listener.motion_state in ["DROP_START", "DROP_COMPLETE"]:
-            label_motion.config(text="DROPPING", bg="blue")
-            publish_motion = "dropping"
-        elif click_listener.motion_state == "STATIONARY":
-            label_motion.config(text="STATIONARY", bg="yellow")
-            publish_motion = "stationary"
-        else:
-            label_motion.config(text="UNKNOWN", bg="grey")
-            publish_motion = "error"
+    def poll_updates():
+        refresh()
+        root.after(POLL_MS, poll_updates)
 
-        # 获取当前频道信息8
-        publish_channel = str(click_listener.channel)
-        
-        # 构造要发布的消息
-        payload = {
-            "click": publish_click,
-            "motion": publish_motion,
-            "channel": publish_channel
-        }
-        msg = String()
-        msg.data = json.dumps(payload)
-        click_listener.publisher_gui.publish(msg)
-        
-        # 每隔 100 毫秒更新一次
-        root.after(100, update_labels)
-    
-    update_labels()  # 启动定时器
+    poll_updates()  # 启动定时器
     root.mainloop()
+
+def main(args=None):
+    options = parse_args(args)
+    # initialize ROS2 node
+    rclpy.init(args=args)
+    click_listener = ClickListener()
+    
+    if options.headless:
+        run_headless(click_listener)
+        return
+    
+    # Run ROS2 spin in a separate thread to avoid blocking the GUI main loop
+    # (单独线程运行 ROS2 spin，避免阻塞 GUI 主循环)
+    ros_thread = threading.Thread(target=ros_spin, args=(click_listener,), daemon=True)
+    ros_thread.start()
+    
+    run_window(click_listener)
     
     # GUI 关闭后清理 ROS2 节点
     click_listener.destroy_node()
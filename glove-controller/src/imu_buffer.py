@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Preallocated ring buffer for IMU samples.
+
+Timestamps and all axes live in one contiguous float64 block, one row per
+sample: [timestamp, ch0, ch1, ...]. Mean and variance over the last
+`window` samples are kept up to date incrementally on every append, so
+reading them costs the same no matter how large the window is.
+"""
+import numpy as np
+
+ACCEL_CHANNELS = ('accel_x', 'accel_y', 'accel_z')
+
+
+class ImuRingBuffer:
+    # Re-sum the window from scratch every this many appends to stop
+    # floating point drift in the running sums (定期重新求和，防止浮点误差累积)
+    RESYNC_INTERVAL = 4096
+
+    def __init__(self, capacity, window, channels=ACCEL_CHANNELS):
+        if window < 1 or window > capacity:
+            raise ValueError('window must be between 1 and capacity')
+        self.capacity = capacity
+        self.window = window
+        self.channels = tuple(channels)
+        self.n_channels = len(self.channels)
+
+        # Column 0 is the timestamp, columns 1.. are the channels
+        # (第0列为时间戳，其余列为各通道数据)
+        self.data = np.zeros((capacity, 1 + self.n_channels), dtype=np.float64)
+        self.count = 0  # Total samples ever written (累计写入的样本数)
+
+        self._sum = np.zeros(self.n_channels, dtype=np.float64)
+        self._sumsq = np.zeros(self.n_channels, dtype=np.float64)
+        self._since_resync = 0
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def channel_index(self, name):
+        """Column index of a channel inside `data`"""
+        return 1 + self.channels.index(name)
+
+    @property
+    def window_full(self):
+        return self.count >= self.window
+
+    def append(self, timestamp, values):
+        """Append one sample (追加单个样本)"""
+        row = self.count % self.capacity
+        values = np.asarray(values, dtype=np.float64)
+
+        # Drop the sample that leaves the detection window (移除离开窗口的样本)
+        if self.count >= self.window:
+            old = self.data[(self.count - self.window) % self.capacity, 1:]
+            self._sum -= old
+            self._sumsq -= old * old
+
+        self.data[row, 0] = timestamp
+        self.data[row, 1:] = values
+        self._sum += values
+        self._sumsq += values * values
+        self.count += 1
+
+        self._since_resync += 1
+        if self._since_resync >= self.RESYNC_INTERVAL:
+            self._resync()
+
+    def extend(self, timestamps, values):
+        """
+        Append a batch of samples in one vectorized write (批量追加样本)
+
+        `timestamps` has shape (N,) and `values` shape (N, n_channels).
+        """
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        values = np.asarray(values, dtype=np.float64).reshape(len(timestamps), self.n_channels)
+        n = len(timestamps)
+        if n == 0:
+            return
+        if n > self.capacity:
+            # Only the newest `capacity` samples survive anyway (仅保留最新的样本)
+            self.count += n - self.capacity
+            timestamps, values = timestamps[-self.capacity:], values[-self.capacity:]
+            n = self.capacity
+
+        # Samples leaving the window must be read before they are overwritten
+        # (在覆盖之前读取离开窗口的样本)
+        first_leaving = self.count - self.window
+        leaving_rows = np.arange(max(first_leaving, 0), max(first_leaving + n, 0)) % self.capacity
+        leaving = self.data[leaving_rows, 1:]
+
+        rows = np.arange(self.count, self.count + n) % self.capacity
+        self.data[rows, 0] = timestamps
+        self.data[rows, 1:] = values
+        self.count += n
+
+        self._since_resync += n
+        if n >= self.window or self._since_resync >= self.RESYNC_INTERVAL:
+            self._resync()
+        else:
+            self._sum += values.sum(axis=0) - leaving.sum(axis=0)
+            self._sumsq += (values * values).sum(axis=0) - (leaving * leaving).sum(axis=0)
+
+    @property
+    def max_batch(self):
+        """Largest batch `rolling_mean` can cover after a single `extend`"""
+        return self.capacity - self.window + 1
+
+    def rolling_mean(self, n):
+        """
+        Window mean as seen by each of the last `n` samples (每个样本对应的窗口均值)
+
+        Returns `(means, full)`: `means` has shape (n, n_channels), and `full`
+        marks samples that had a complete window behind them. `n` must not
+        exceed `max_batch`.
+        """
+        if n > self.max_batch:
+            raise ValueError('rolling_mean covers at most capacity - window + 1 samples')
+        first = max(self.count - n - self.window + 1, 0)
+        rows = np.arange(first, self.count) % self.capacity
+        csum = np.cumsum(self.data[rows, 1:], axis=0)
+        csum = np.vstack((np.zeros((1, self.n_channels)), csum))
+
+        # Global sample index of each requested sample (样本的全局序号)
+        index = np.arange(self.count - n, self.count)
+        end = index - first + 1
+        start = np.maximum(index - self.window + 1, first) - first
+        sizes = (end - start)[:, None]
+        means = (csum[end] - csum[start]) / sizes
+        return means, index + 1 >= self.window
+
+    def window_view(self):
+        """Samples currently inside the detection window, oldest first (copy)"""
+        n = min(self.count, self.window)
+        rows = (np.arange(self.count - n, self.count)) % self.capacity
+        return self.data[rows]
+
+    def latest(self, n=None):
+        """Last `n` samples (default: everything held), oldest first (copy)"""
+        held = len(self)
+        n = held if n is None else min(n, held)
+        rows = (np.arange(self.count - n, self.count)) % self.capacity
+        return self.data[rows]
+
+    def since(self, cursor):
+        """
+        Samples written after the first `cursor` samples, oldest first (copy),
+        and the new cursor. Samples already overwritten are skipped.
+        """
+        first = max(cursor, self.count - len(self))
+        rows = np.arange(first, self.count) % self.capacity
+        return self.data[rows], self.count
+
+    def mean(self):
+        """Per-channel mean over the detection window (窗口内各通道均值)"""
+        n = min(self.count, self.window)
+        if n == 0:
+            return np.zeros(self.n_channels)
+        return self._sum / n
+
+    def var(self):
+        """Per-channel population variance over the detection window (窗口内各通道方差)"""
+        n = min(self.count, self.window)
+        if n == 0:
+            return np.zeros(self.n_channels)
+        mean = self._sum / n
+        return np.maximum(self._sumsq / n - mean * mean, 0.0)
+
+    def _resync(self):
+        window = self.window_view()[:, 1:]
+        self._sum = window.sum(axis=0)
+        self._sumsq = (window * window).sum(axis=0)
+        self._since_resync = 0
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Compact binary wire format for glove sensor frames.
+
+IMU frame (little endian):
+    header  : magic b'GI', version, n_channels, n_samples, reserved, t0 (float64)
+    payload : float32[n_samples][1 + n_channels]
+              column 0 is the sample time relative to t0 in seconds,
+              columns 1.. are the axes in IMU_CHANNELS order
+              (accel only, accel + gyro, or accel + gyro + mag)
+
+Force frame (little endian):
+    header  : magic b'GF', version, 1, n_samples, reserved, t0 (float64)
+    payload : float32[n_samples] time offsets, then int32[n_samples] raw values
+
+Decoding returns numpy views straight onto the received buffer, no copy.
+Text payloads are recognised automatically and parsed as the JSON messages
+published on imu/all_data, single-sample or batched.
+
+Run this file directly to compare size and decode time against JSON.
+"""
+import json
+import struct
+from collections import namedtuple
+
+import numpy as np
+
+IMU_MAGIC = b'GI'
+FORCE_MAGIC = b'GF'
+VERSION = 1
+
+# magic, version, n_channels, n_samples, reserved, t0
+HEADER = struct.Struct('<2sBBHHd')
+
+IMU_CHANNELS = (
+    'accel_x', 'accel_y', 'accel_z',
+    'gyro_x', 'gyro_y', 'gyro_z',
+    'mag_x', 'mag_y', 'mag_z',
+)
+_JSON_GROUPS = ('accel', 'gyro', 'mag')
+
+ImuFrame = namedtuple('ImuFrame', ['timestamps', 'values'])
+ForceFrame = namedtuple('ForceFrame', ['timestamps', 'values'])
+
+
+def encode_imu_frame(timestamps, values):
+    """Pack N samples, `values` of shape (N, 3 | 6 | 9), into one frame"""
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    values = np.asarray(values, dtype=np.float32).reshape(len(timestamps), -1)
+    n_samples, n_channels = values.shape
+    if n_channels not in (3, 6, 9):
+        raise ValueError('IMU frames carry 3, 6 or 9 channels')
+    t0 = float(timestamps[0]) if n_samples else 0.0
+
+    block = np.empty((n_samples, 1 + n_channels), dtype='<f4')
+    block[:, 0] = timestamps - t0
+    block[:, 1:] = values
+    return HEADER.pack(IMU_MAGIC, VERSION, n_channels, n_samples, 0, t0) + block.tobytes()
+
+
+def encode_force_frame(timestamps, values):
+    """Pack N raw force readings into one frame"""
+    timestamps = np.asarray(timestamps, dtype=np.float64)
+    n_samples = len(timestamps)
+    t0 = float(timestamps[0]) if n_samples else 0.0
+    offsets = (timestamps - t0).astype('<f4')
+    raw = np.asarray(values).astype('<i4')
+    return HEADER.pack(FORCE_MAGIC, VERSION, 1, n_samples, 0, t0) + offsets.tobytes() + raw.tobytes()
+
+
+def _unpack_header(buf, magic):
+    found, version, n_channels, n_samples, _, t0 = HEADER.unpack_from(buf)
+    if found != magic:
+        raise ValueError(f'Unexpected frame magic {found!r}')
+    if version != VERSION:
+        raise ValueError(f'Unsupported frame version {version}')
+    return n_channels, n_samples, t0
+
+
+def decode_imu_frame(buf):
+    """Decode a binary IMU frame; `values` is a zero-copy view onto `buf`"""
+    n_channels, n_samples, t0 = _unpack_header(buf, IMU_MAGIC)
+    block = np.frombuffer(buf, dtype='<f4', count=n_samples * (1 + n_channels),
+                          offset=HEADER.size).reshape(n_samples, 1 + n_channels)
+    return ImuFrame(t0 + block[:, 0].astype(np.float64), block[:, 1:])
+
+
+def decode_force_frame(buf):
+    """Decode a binary force frame; `values` is a zero-copy view onto `buf`"""
+    _, n_samples, t0 = _unpack_header(buf, FORCE_MAGIC)
+    offsets = np.frombuffer(buf, dtype='<f4', count=n_samples, offset=HEADER.size)
+    values = np.frombuffer(buf, dtype='<i4', count=n_samples, offset=HEADER.size + 4 * n_samples)
+    return ForceFrame(t0 + offsets.astype(np.float64), values)
+
+
+def is_binary(payload, magic=IMU_MAGIC):
+    """True if `payload` starts with the given frame magic"""
+    if isinstance(payload, str) or len(payload) < HEADER.size:
+        return False
+    return bytes(memoryview(payload)[:2]) == magic
+
+
+def decode_imu_json(text):
+    """Parse a JSON imu/all_data message (single sample or columnar batch)"""
+    data = json.loads(text)
+    # Channels are always a prefix of IMU_CHANNELS
+    groups = ['accel']
+    for group in _JSON_GROUPS[1:]:
+        if group not in data:
+            break
+        groups.append(group)
+
+    timestamp = data['timestamp']
+    if isinstance(timestamp, list):
+        columns = [data[g][axis] for g in groups for axis in ('x', 'y', 'z')]
+        return ImuFrame(np.asarray(timestamp, dtype=np.float64),
+                        np.column_stack(columns).astype(np.float64))
+    row = [data[g][axis] for g in groups for axis in ('x', 'y', 'z')]
+    return ImuFrame(np.array([timestamp], dtype=np.float64),
+                    np.array([row], dtype=np.float64))
+
+
+def decode_imu_payload(payload):
+    """Decode either wire format, detected from the payload itself"""
+    if is_binary(payload, IMU_MAGIC):
+        return decode_imu_frame(payload)
+    if not isinstance(payload, str):
+        payload = bytes(payload).decode('utf-8')
+    return decode_imu_json(payload)
+
+
+def _benchmark(n_frames=2000):
+    import time
+
+    rng = np.random.default_rng(0)
+    sample = rng.normal(size=9).tolist()
+    text = json.dumps({
+        'timestamp': 1700000000.123,
+        'accel': dict(zip('xyz', sample[0:3])),
+        'gyro': dict(zip('xyz', sample[3:6])),
+        'mag': dict(zip('xyz', sample[6:9])),
+    })
+    frame = encode_imu_frame([1700000000.123], [sample])
+
+    for name, payload in (('json', text), ('binary', frame)):
+        start = time.perf_counter()
+        for _ in range(n_frames):
+            decode_imu_payload(payload)
+        elapsed = (time.perf_counter() - start) / n_frames
+        print(f'{name:>6}: {len(payload):4d} bytes/frame, {elapsed * 1e6:6.2f} us/frame decode')
+
+    batch = 50
+    frame = encode_imu_frame(np.arange(batch) * 0.001, rng.normal(size=(batch, 9)))
+    start = time.perf_counter()
+    for _ in range(n_frames):
+        decode_imu_payload(frame)
+    elapsed = (time.perf_counter() - start) / (n_frames * batch)
+    print(f'binary x{batch}: {len(frame) / batch:.1f} bytes/sample, {elapsed * 1e6:6.2f} us/sample decode')
+
+
+if __name__ == '__main__':
+    _benchmark()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Windowed signal features for the glove IMU: per-axis RMS, jerk and FFT band
+energies over overlapping windows.
+
+All windows are cut from the sample block as strided views and transformed
+by a single batched `np.fft.rfft`, so the cost per window is pure NumPy
+(所有窗口一次性批量FFT，无逐窗口Python循环).
+
+Band power is the share of the window's variance inside each band, in
+squared input units (e.g. g^2), so the bands of one axis add up to roughly
+its variance.
+
+ROS-free; MotionDetector publishes the summaries on "imu/features". Run this
+file directly to benchmark windows/sec.
+"""
+from collections import namedtuple
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from imu_buffer import ACCEL_CHANNELS, ImuRingBuffer
+
+# (name, low Hz, high Hz); None means up to Nyquist (频带定义)
+DEFAULT_BANDS = (
+    ('motion', 0.3, 3.0),
+    ('tremor', 4.0, 12.0),
+    ('vibration', 12.0, None),
+)
+
+WindowFeatures = namedtuple('WindowFeatures', ['timestamps', 'sample_rate', 'rms', 'jerk', 'bands', 'dominant'])
+
+
+class FeatureExtractor:
+    def __init__(self, window=128, step=64, bands=DEFAULT_BANDS):
+        if window < 2 or not 1 <= step <= window:
+            raise ValueError('window must be at least 2 and step between 1 and window')
+        self.window = window  # Samples per window (每个窗口的样本数)
+        self.step = step      # Samples between window starts (窗口步长)
+        self.bands = tuple(bands)
+        self.taper = np.hanning(window)
+        # Scale so that the one-sided spectrum sums to the mean square (Parseval)
+        self.scale = np.full(window // 2 + 1, 2.0 / (window * np.sum(self.taper ** 2)))
+        self.scale[0] /= 2.0
+        if window % 2 == 0:
+            self.scale[-1] /= 2.0
+
+    def band_matrix(self, sample_rate):
+        """(bands, bins) 0/1 matrix selecting the rfft bins of each band (频带选择矩阵)"""
+        freqs = np.fft.rfftfreq(self.window, 1.0 / sample_rate)
+        nyquist = sample_rate / 2.0
+        return np.array([(freqs >= low) & (freqs <= (nyquist if high is None else high))
+                         for _, low, high in self.bands], dtype=np.float64)
+
+    def empty_bands(self, sample_rate):
+        """
+        Names of the bands that contain no FFT bin at this sample rate, i.e.
+        the window is too short (bins too coarse) to resolve them; those
+        bands always come out ~0 (频率分辨率不足、没有FFT频点的频带)
+        """
+        return [name for (name, _, _), row in zip(self.bands, self.band_matrix(sample_rate)) if not row.any()]
+
+    def compute(self, samples):
+        """
+        Features of every window in `samples`, rows [timestamp, ch0, ch1, ...]
+        (计算所有窗口的特征). Windows are aligned so the last one ends on the
+        newest sample. Returns WindowFeatures with arrays of shape
+        (windows, channels), bands (windows, bands, channels), or None if
+        there are fewer samples than one window.
+        """
+        n = len(samples)
+        if n < self.window:
+            return None
+        timestamps = samples[:, 0]
+        values = samples[:, 1:]
+        span = timestamps[-1] - timestamps[0]
+        sample_rate = (n - 1) / span if span > 0 else 1.0
+
+        offset = (n - self.window) % self.step
+        # (windows, channels, window) views, no copies (滑动窗口视图)
+        windows = sliding_window_view(values, self.window, axis=0)[offset::self.step]
+        ends = timestamps[offset + self.window - 1::self.step]
+
+        centred = windows - windows.mean(axis=-1, keepdims=True)
+        rms = np.sqrt(np.mean(windows * windows, axis=-1))
+
+        # Jerk: derivative of the signal, RMS per window (加加速度)
+        jerk = np.diff(values, axis=0) * sample_rate
+        jerk_windows = sliding_window_view(jerk, self.window - 1, axis=0)[offset::self.step]
+        jerk_rms = np.sqrt(np.mean(jerk_windows * jerk_windows, axis=-1))
+
+        spectrum = np.fft.rfft(centred * self.taper, axis=-1)
+        power = (spectrum.real ** 2 + spectrum.imag ** 2) * self.scale
+        bands = np.einsum('wcf,bf->wbc', power, self.band_matrix(sample_rate))
+        freqs = np.fft.rfftfreq(self.window, 1.0 / sample_rate)
+        dominant = freqs[1:][np.argmax(power[..., 1:], axis=-1)]
+
+        return WindowFeatures(ends, sample_rate, rms, jerk_rms, bands, dominant)
+
+    def summarize(self, features, channels):
+        """
+        Compact JSON-ready summary of a batch of windows (汇总为可发布的字典):
+        mean RMS and band power, peak jerk, dominant frequency of the last window
+        """
+        axes = [name.split('_')[-1] for name in channels]
+
+        def per_axis(values):
+            return dict(zip(axes, np.round(values, 6).tolist()))
+
+        return {
+            'timestamp': float(features.timestamps[-1]),
+            'sample_rate': round(float(features.sample_rate), 3),
+            'windows': len(features.timestamps),
+            'rms': per_axis(features.rms.mean(axis=0)),
+            'jerk': per_axis(features.jerk.max(axis=0)),
+            'bands': {name: per_axis(power) for (name, _, _), power in zip(self.bands, features.bands.mean(axis=0))},
+            'dominant_hz': per_axis(features.dominant[-1]),
+        }
+
+
+def warn_empty_bands(logger, extractor, sample_rate):
+    """Log a warning if the window cannot resolve some bands at this rate (频带无法分辨时警告)"""
+    empty = extractor.empty_bands(sample_rate)
+    if empty:
+        resolution = sample_rate / extractor.window
+        logger.warning(
+            f'features_window {extractor.window} at {sample_rate:.1f} Hz gives {resolution:.2f} Hz bins; '
+            f'band(s) {", ".join(empty)} get no bins and will read ~0 - use a longer window')
+    return empty
+
+
+class FeatureStage:
+    """
+    Buffers incoming samples and turns everything received since the last
+    poll into one feature summary (缓存样本，每次轮询输出一次特征汇总)
+    """
+
+    def __init__(self, extractor=None, capacity=4096, channels=ACCEL_CHANNELS):
+        self.extractor = FeatureExtractor() if extractor is None else extractor
+        self.channels = tuple(channels)
+        self.buffer = ImuRingBuffer(capacity, 1, self.channels)
+        self.cursor = 0
+
+    def push(self, timestamps, values):
+        self.buffer.extend(timestamps, values)
+
+    def take(self):
+        """
+        Samples needed for the next summary: everything new plus enough
+        history for the overlapping windows (取出新样本及窗口重叠所需的历史);
+        None until a full window is available
+        """
+        extractor = self.extractor
+        new = self.buffer.count - self.cursor
+        if new <= 0 or len(self.buffer) < extractor.window:
+            return None
+        self.cursor = self.buffer.count
+        return self.buffer.latest(max(new + extractor.window - extractor.step, extractor.window))
+
+    def summarize(self, samples):
+        features = self.extractor.compute(samples)
+        if features is None:
+            return None
+        return self.extractor.summarize(features, self.channels)
+
+
+def _benchmark(seconds=60, sample_rate=1000.0):
+    import time
+
+    rng = np.random.default_rng(0)
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    values = np.column_stack([
+        0.05 * np.sin(2 * np.pi * 7.0 * t),
+        0.02 * np.sin(2 * np.pi * 40.0 * t),
+        1.0 + 0.2 * np.sin(2 * np.pi * 1.0 * t),
+    ]) + rng.normal(0, 0.01, (len(t), 3))
+    samples = np.column_stack((t, values))
+    for window, step in ((128, 64), (256, 128), (512, 256)):
+        extractor = FeatureExtractor(window, step)
+        start = time.perf_counter()
+        features = extractor.compute(samples)
+        elapsed = time.perf_counter() - start
+        n_windows = len(features.timestamps)
+        print(f'window {window:4d}: {n_windows:5d} windows in {elapsed * 1e3:7.2f} ms '
+              f'({n_windows / elapsed:9.0f} windows/s, {seconds / elapsed:6.0f}x real time)')
+
+
+if __name__ == '__main__':
+    _benchmark()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Glove IMU pipeline: every detector in one node, fed by a shared FrameBus so
+each imu/all_data message is parsed exactly once (所有检测器共享一次解码).
+
+    imu/all_data, imu/all_data_bin
+        -> motion      motion/detection   (lift / drop / stationary)
+        -> gesture     motion/detection   (DTW, with -p gesture_library:=...)
+        -> orientation imu/orientation    (needs accel + gyro frames)
+        -> features    imu/features       (pulled at features_rate)
+    per-consumer lag                      imu/pipeline_stats
+
+    python3 imu_pipeline.py --ros-args -p gesture_library:=gestures.json
+"""
+import json
+import threading
+
+import rclpy
+from rclpy.node import Node
+from std_msgs.msg import String, UInt8MultiArray
+
+from frame_bus import FrameBus
+from gesture_dtw import GestureLibrary, GestureMatcher
+from imu_buffer import ACCEL_CHANNELS
+from imu_features import FeatureExtractor, warn_empty_bands
+from motion_engine import MotionEngine
+from orientation_filter import MadgwickFilter, orientation_message
+
+
+class ImuPipeline(Node):
+    def __init__(self):
+        super().__init__('imu_pipeline')
+
+        self.bus = FrameBus(capacity=self.declare_parameter('bus_capacity', 8192).value)
+        self.data_lock = threading.Lock()
+
+        self.motion_pub = self.create_publisher(String, 'motion/detection', 10)
+        self.orientation_pub = self.create_publisher(String, 'imu/orientation', 10)
+        self.features_pub = self.create_publisher(String, 'imu/features', 10)
+        self.stats_pub = self.create_publisher(String, 'imu/pipeline_stats', 10)
+
+        # Motion detection (动作检测)
+        self.engine = MotionEngine(logger=self.get_logger())
+        self.bus.register('motion', self.motion_consumer)
+
+        # Gesture matching reads its windows straight from the bus (手势匹配直接读取总线)
+        self.gesture_matcher = None
+        library_path = self.declare_parameter('gesture_library', '').value
+        if library_path:
+            library = GestureLibrary.load(library_path)
+            self.gesture_matcher = GestureMatcher(
+                library,
+                hop=self.declare_parameter('gesture_hop', 10).value,
+                threshold=self.declare_parameter('gesture_threshold', 1.0).value)
+            self.bus.register('gesture', self.gesture_consumer)
+            self.get_logger().info(f'Loaded {len(library)} gesture templates from {library_path}')
+
+        # Orientation fusion (姿态融合)
+        self.orientation = None
+        if self.declare_parameter('orientation', True).value:
+            self.orientation = MadgwickFilter(beta=self.declare_parameter('beta', 0.1).value)
+            self.bus.register('orientation', self.orientation_consumer)
+
+        # Spectral features, pulled by a timer (定时拉取的频谱特征); off by default (0)
+        self.features = None
+        self.features_checked = False
+        features_rate = self.declare_parameter('features_rate', 0.0).value
+        if features_rate > 0:
+            self.features = FeatureExtractor(
+                window=self.declare_parameter('features_window', 128).value,
+                step=self.declare_parameter('features_step', 64).value)
+            self.features_consumer = self.bus.register('features')
+            self.features_timer = self.create_timer(1.0 / features_rate, self.features_callback)
+
+        self.subscription = self.create_subscription(String, 'imu/all_data', self.data_callback, 10)
+        self.subscription_bin = self.create_subscription(
+            UInt8MultiArray, 'imu/all_data_bin', self.data_callback, 10)
+
+        stats_period = self.declare_parameter('stats_period', 5.0).value
+        self.stats_timer = self.create_timer(stats_period, self.stats_callback)
+        self.get_logger().info(
+            f'IMU pipeline initialized with consumers {[c.name for c in self.bus.consumers]}')
+
+    def data_callback(self, msg):
+        """Decode once, then every push consumer runs on views of the bus (解码一次并分发)"""
+        try:
+            with self.data_lock:
+                self.bus.publish(msg.data)
+        except Exception as e:
+            self.get_logger().error(f'Processing data failed: {e}')
+
+    def publish_motion(self, motion, timestamp, **extra):
+        result_msg = String()
+        result_msg.data = json.dumps({'motion': motion, 'timestamp': timestamp, **extra})
+        self.motion_pub.publish(result_msg)
+
+    def motion_consumer(self, block):
+        for event in self.engine.ingest(block[0], block[1:4].T):
+            self.publish_motion(event.motion, event.timestamp)
+
+    def gesture_consumer(self, block):
+        gesture = self.gesture_matcher.update(self.bus)
+        if gesture is not None:
+            self.publish_motion('GESTURE', gesture.timestamp,
+                                gesture=gesture.gesture, distance=gesture.distance)
+            self.get_logger().info(f'Detected gesture: {gesture.gesture} ({gesture.distance:.3f})')
+
+    def orientation_consumer(self, block):
+        n_channels = self.bus.n_channels
+        if n_channels < 6:
+            return  # Accel only, nothing to fuse (仅有加速度，无法融合)
+        mag = block[7:10].T if n_channels >= 9 else None
+        quats = self.orientation.update(block[0], block[1:4].T, block[4:7].T, mag)
+        msg = String()
+        msg.data = orientation_message(block[0], quats)
+        self.orientation_pub.publish(msg)
+
+    def features_callback(self):
+        extractor = self.features
+        try:
+            with self.data_lock:
+                # Leave the cursor alone until a full window is buffered, and
+                # when fewer than `step` samples are new, reach back far enough
+                # for one window so they are still used, like FeatureStage.take
+                # (不足一个窗口时不前移游标；新样本不足一步时补足历史)
+                if len(self.bus) < extractor.window:
+                    return
+                lag = self.bus.count - self.features_consumer.cursor
+                history = max(extractor.window - extractor.step, extractor.window - lag)
+                block = self.bus.read(self.features_consumer, history=history)
+                # Copy out so the FFTs can run without holding the bus (复制后在锁外计算)
+                samples = None if block is None else block[:4].T.copy()
+            if samples is None:
+                return
+            features = extractor.compute(samples)
+            if features is None:
+                return
+            if not self.features_checked:
+                self.features_checked = True
+                warn_empty_bands(self.get_logger(), extractor, features.sample_rate)
+            msg = String()
+            msg.data = json.dumps(extractor.summarize(features, ACCEL_CHANNELS))
+            self.features_pub.publish(msg)
+        except Exception as e:
+            self.get_logger().error(f'Feature extraction failed: {e}')
+
+    def stats_callback(self):
+        """Report how far behind each consumer is (报告各消费者的滞后情况)"""
+        with self.data_lock:
+            report = self.bus.lag_report()
+        for name, stats in report.items():
+            if stats['dropped']:
+                self.get_logger().warning(f'Consumer {name} fell behind, {stats["dropped"]} samples dropped')
+        msg = String()
+        msg.data = json.dumps(report)
+        self.stats_pub.publish(msg)
+
+
+def main(args=None):
+    rclpy.init(args=args)
+    node = ImuPipeline()
+    try:
+        rclpy.spin(node)
+    except KeyboardInterrupt:
+        print("User interrupted, shutting down...")
+    finally:
+        node.destroy_node()
+        rclpy.shutdown()
+
+
+if __name__ == '__main__':
+    main()
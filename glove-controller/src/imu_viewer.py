@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Stand-alone viewer for the glove motion detector.
+
+Reads samples and detector state from the shared-memory ring written by
+`mpu_detector.py --shm-viewer`, so plotting runs in its own interpreter and
+never competes with detection for the GIL (在独立进程中绘图，不与检测争用GIL).
+
+    python3 imu_viewer.py --shm-name glove_imu
+"""
+import argparse
+import time
+
+from shm_ring import SharedImuRing
+
+
+def attach(name, timeout=10.0):
+    """Wait for the detector to create the ring (等待检测进程创建共享内存)"""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            return SharedImuRing.attach(name)
+        except FileNotFoundError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.2)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Shared-memory viewer for the glove motion detector')
+    parser.add_argument('--shm-name', default='glove_imu', help='name of the shared-memory ring')
+    parser.add_argument('--plot-fps', type=float, default=20.0, help='maximum redraw rate')
+    parser.add_argument('--plot-span', type=float, default=5.0, help='seconds of data shown')
+    parser.add_argument('--lift-threshold', type=float, default=1.2)
+    parser.add_argument('--drop-threshold', type=float, default=0.8)
+    options = parser.parse_args(argv)
+
+    ring = attach(options.shm_name)
+    # Only the viewer process pays for matplotlib (只有查看器进程加载matplotlib)
+    from live_plot import LivePlot
+    plot = LivePlot(options.lift_threshold, options.drop_threshold,
+                    span=options.plot_span, max_fps=options.plot_fps)
+    try:
+        plot.run(ring.read_since)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        plot.close()
+        ring.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+In-process message routing for glove nodes that share one process.
+
+rclpy has no intra-process communication (that is an rclcpp feature), so
+every publish goes through serialization and DDS even when the subscriber
+lives in the same interpreter. `composed(NodeClass, router)` returns a
+subclass of an existing node that routes its topics through an
+IntraProcessRouter instead (同进程内直接投递消息):
+
+- Topics in `local_topics` are delivered by calling the in-process
+  subscription callbacks directly with the published message object - no
+  copy, no serialization. They are still published over DDS, but only
+  when some other process is subscribed; in-process nodes do not subscribe
+  to them over DDS, so nothing is delivered twice.
+- A local topic is only routed in-process once a node of this process
+  publishes it. A subscription created before that (e.g. `--nodes gui,mqtt`
+  with the detectors running as their own processes) is a normal DDS
+  subscription, and keeps receiving over DDS if a local publisher appears
+  later; the local publisher forwards to DDS whenever it has subscribers.
+- Sensor streams (topics starting with one of `sensor_prefixes`) use the
+  sensor-data QoS profile (best effort, keep last 5) instead of the
+  default reliable queue of 10. State and event topics such as click,
+  motion/detection and GUI stay reliable: they are only sent on change, so
+  a lost message would leave subscribers in the wrong state, and
+  standalone subscribers asking for reliable QoS must still match.
+
+Callbacks for local topics run synchronously in the publisher's thread.
+"""
+from collections import Counter, defaultdict
+
+from rclpy.qos import qos_profile_sensor_data
+
+# Topics produced and consumed inside the glove stack (进程内产生并消费的话题)
+LOCAL_TOPICS = ('click', 'motion/detection', 'GUI')
+# Sensor streams that may drop rather than queue (传感器数据流使用传感器QoS)
+SENSOR_TOPIC_PREFIXES = ('imu/', 'force_sensor')
+
+
+class IntraProcessRouter:
+    def __init__(self, local_topics=LOCAL_TOPICS, sensor_prefixes=SENSOR_TOPIC_PREFIXES):
+        self.local_topics = set(local_topics)
+        self.sensor_prefixes = tuple(sensor_prefixes)
+        self.callbacks = defaultdict(list)
+        self.published = set()  # Local topics with a publisher in this process (本进程内有发布者的话题)
+        self.delivered = Counter()  # Local deliveries per topic (各话题的进程内投递次数)
+        self.forwarded = Counter()  # Publishes also sent over DDS (同时经DDS发布的次数)
+
+    def is_local(self, topic):
+        return topic in self.local_topics
+
+    def add_publisher(self, topic):
+        self.published.add(topic)
+
+    def routes_locally(self, topic):
+        """Subscriptions to `topic` are served in-process (进程内投递)"""
+        return topic in self.published
+
+    def qos(self, topic, qos_profile):
+        return qos_profile_sensor_data if topic.startswith(self.sensor_prefixes) else qos_profile
+
+    def subscribe(self, topic, callback):
+        self.callbacks[topic].append(callback)
+        return LocalSubscription(topic, callback)
+
+    def deliver(self, topic, msg):
+        for callback in self.callbacks[topic]:
+            callback(msg)
+        self.delivered[topic] += len(self.callbacks[topic])
+
+
+class LocalSubscription:
+    """Stands in for the rclpy Subscription of a locally routed topic"""
+
+    def __init__(self, topic, callback):
+        self.topic_name = topic
+        self.callback = callback
+
+
+class LocalPublisher:
+    """Wraps an rclpy Publisher; in-process subscribers get the message object itself"""
+
+    def __init__(self, router, topic, publisher):
+        self.router = router
+        self.topic = topic
+        self.publisher = publisher
+
+    def publish(self, msg):
+        self.router.deliver(self.topic, msg)
+        # Only pay for serialization when another process listens (仅当其他进程订阅时才经DDS发布)
+        if self.publisher.get_subscription_count() > 0:
+            self.publisher.publish(msg)
+            self.router.forwarded[self.topic] += 1
+
+    def __getattr__(self, name):
+        return getattr(self.publisher, name)
+
+
+def composed(node_class, router):
+    """Subclass of `node_class` whose topics go through `router`"""
+
+    class ComposedNode(node_class):
+        def create_subscription(self, msg_type, topic, callback, qos_profile, **kwargs):
+            if router.routes_locally(topic):
+                return router.subscribe(topic, callback)
+            return super().create_subscription(msg_type, topic, callback,
+                                               router.qos(topic, qos_profile), **kwargs)
+
+        def create_publisher(self, msg_type, topic, qos_profile, **kwargs):
+            publisher = super().create_publisher(msg_type, topic, router.qos(topic, qos_profile), **kwargs)
+            if router.is_local(topic):
+                router.add_publisher(topic)
+                return LocalPublisher(router, topic, publisher)
+            return publisher
+
+    ComposedNode.__name__ = ComposedNode.__qualname__ = node_class.__name__
+    return ComposedNode
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Live acceleration plot for the glove motion detector.
+
+- Blitting: axes, grid, threshold lines and legend are drawn once and cached
+  as a background; each frame only redraws the lines and the two texts
+  (静态背景缓存，每帧只重绘曲线和文字)
+- Only samples that arrived since the previous frame are pulled from the
+  data source (每帧只读取新增样本)
+- Min/max decimation to the axes' pixel width (按像素宽度做最小/最大值抽取)
+- Redraw rate capped by `max_fps`, independent of the sensor rate (重绘频率上限)
+"""
+import time
+
+import matplotlib.pyplot as plt
+import numpy as np
+
+from imu_buffer import ImuRingBuffer
+
+STATE_COLORS = {'UP': 'red', 'DOWN': 'blue'}  # everything else is green
+
+
+def minmax_decimate(times, values, n_bins):
+    """
+    Reduce `values` (N, C) to at most 2 * n_bins points per channel, keeping
+    each bin's minimum and maximum so spikes stay visible
+    (保留每个区间的最小值和最大值)
+    """
+    n = len(times)
+    if n_bins < 1 or n <= 2 * n_bins:
+        return times, values
+    per_bin = n // n_bins
+    start = n - per_bin * n_bins  # Drop the oldest remainder (丢弃最旧的余数部分)
+    binned_times = times[start:].reshape(n_bins, per_bin)
+    binned = values[start:].reshape(n_bins, per_bin, values.shape[1])
+    x = np.column_stack((binned_times[:, 0], binned_times[:, -1])).ravel()
+    y = np.stack((binned.min(axis=1), binned.max(axis=1)), axis=1).reshape(2 * n_bins, values.shape[1])
+    return x, y
+
+
+class LivePlot:
+    def __init__(self, lift_threshold, drop_threshold, span=5.0, max_fps=20.0, history=8192):
+        self.span = span
+        self.frame_interval = 1.0 / max_fps
+        self.next_frame = 0.0
+        # Local history so the plot can show more than the detector keeps
+        # (本地历史缓冲区，可显示比检测窗口更长的数据)
+        self.history = ImuRingBuffer(history, 1)
+
+        # Setup plot (设置图表)
+        self.fig, self.ax = plt.subplots(figsize=(10, 6))
+        ax = self.ax
+        ax.set_title('MPU9250 Acceleration Data and Motion Detection')
+        ax.set_xlabel('Time relative to newest sample (s)')
+        ax.set_ylabel('Acceleration (g)')
+        ax.grid(True)
+
+        # Create line objects (创建线条对象)
+        line_x, = ax.plot([], [], 'r-', label='X-axis')
+        line_y, = ax.plot([], [], 'g-', label='Y-axis')
+        line_z, = ax.plot([], [], 'b-', label='Z-axis')
+        self.lines = [line_x, line_y, line_z]
+
+        # Add threshold lines (添加阈值线)
+        ax.axhline(y=lift_threshold, color='m', linestyle='--', label='Lift Threshold')
+        ax.axhline(y=drop_threshold, color='c', linestyle='--', label='Drop Threshold')
+        ax.legend(loc='upper right')
+
+        # Fixed axes keep the cached background valid (固定坐标轴范围，使背景缓存保持有效)
+        ax.set_xlim(-span, 0.05 * span)
+        ax.set_ylim(-2, 2)
+
+        self.status_text = ax.text(0.02, 0.95, '', transform=ax.transAxes,
+                                   bbox=dict(facecolor='white', alpha=0.5))
+        self.motion_text = ax.text(0.5, 0.5, 'STATIONARY',
+                                   transform=ax.transAxes,
+                                   fontsize=20, ha='center', va='center',
+                                   bbox=dict(facecolor='white', alpha=0.7))
+
+        self.artists = self.lines + [self.status_text, self.motion_text]
+        self.blit = self.fig.canvas.supports_blit
+        for artist in self.artists:
+            artist.set_animated(self.blit)
+        self.background = None
+        self.fig.canvas.mpl_connect('draw_event', self._on_draw)
+
+    def _on_draw(self, event):
+        """Full redraw (first show, resize): re-cache the background (重新缓存背景)"""
+        self.background = self.fig.canvas.copy_from_bbox(self.fig.bbox)
+        for artist in self.artists:
+            self.ax.draw_artist(artist)
+
+    def is_open(self):
+        return plt.fignum_exists(self.fig.number)
+
+    def feed(self, rows):
+        """Append new [timestamp, x, y, z, ...] rows (追加新样本)"""
+        if len(rows):
+            self.history.extend(rows[:, 0], rows[:, 1:4])
+
+    def render(self, motion_status, state):
+        """Redraw if a frame is due; returns True when something was drawn"""
+        now = time.monotonic()
+        if now < self.next_frame:
+            return False
+        self.next_frame = now + self.frame_interval
+
+        samples = self.history.latest()
+        if len(samples):
+            times = samples[:, 0] - samples[-1, 0]
+            first = np.searchsorted(times, -self.span)
+            x, y = minmax_decimate(times[first:], samples[first:, 1:], int(self.ax.bbox.width))
+            for i, line in enumerate(self.lines):
+                line.set_data(x, y[:, i])
+
+        self.status_text.set_text(f'Motion status: {motion_status}')
+        self.motion_text.set_text(state)
+        self.motion_text.set_color(STATE_COLORS.get(state, 'green'))
+
+        canvas = self.fig.canvas
+        if self.blit and self.background is not None:
+            canvas.restore_region(self.background)
+            for artist in self.artists:
+                self.ax.draw_artist(artist)
+            canvas.blit(self.fig.bbox)
+        else:
+            canvas.draw_idle()
+        return True
+
+    def run(self, source):
+        """
+        Drive the plot until its window is closed (运行绘图循环直到窗口关闭)
+
+        `source(cursor)` returns `(rows, cursor, motion_status, state)` with
+        the rows written since `cursor`.
+        """
+        plt.show(block=False)
+        plt.pause(0.1)  # First full draw caches the background (首次完整绘制以缓存背景)
+        cursor = 0
+        while self.is_open():
+            if time.monotonic() >= self.next_frame:
+                rows, cursor, motion_status, state = source(cursor)
+                self.feed(rows)
+                self.render(motion_status, state)
+            self.fig.canvas.flush_events()
+            time.sleep(max(0.0, min(self.next_frame - time.monotonic(), self.frame_interval)))
+
+    def close(self):
+        plt.close(self.fig)
@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+ROS-free lift/drop/stationary classifier for the glove IMU.
+
+All timing comes from sample timestamps, never from the wall clock, so the
+engine gives the same events whether it is fed live from ROS, replayed from
+a log at any speed, or driven from a benchmark.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from imu_buffer import ImuRingBuffer
+
+MotionEvent = namedtuple('MotionEvent', ['motion', 'timestamp'])
+
+
+class MotionEngine:
+    def __init__(self, window_size=10, data_length=200, logger=None):
+        # Motion detection parameters (动作检测参数)
+        self.LIFT_THRESHOLD = 1.2     # Lift threshold: >1.2g (抬起阈值)
+        self.DROP_THRESHOLD = 0.8     # Drop threshold: <0.8g (降下阈值)
+        self.MOTION_DURATION = 0.3    # Motion duration threshold in seconds (动作持续时间阈值)
+        self.COOLDOWN_TIME = 0.5      # Cooldown time between detections (两次检测之间的冷却时间)
+
+        # Shared ring buffer for detection and visualization: the last
+        # `window_size` samples form the detection window, the whole ring
+        # is plotted (检测与可视化共用的环形缓冲区)
+        self.window_size = window_size
+        self.data_length = data_length
+        self.imu_buffer = ImuRingBuffer(data_length, window_size)
+        self.accel_z_index = self.imu_buffer.channels.index('accel_z')
+
+        # Motion detection state, all times are IMU sample timestamps
+        # (动作检测状态，时间均为IMU样本时间戳)
+        self.last_detection_time = None
+        self.motion_start_time = 0
+        self.is_lifting = False
+        self.is_dropping = False
+        self.is_stationary = True
+        self.motion_in_progress = False
+
+        # Current motion state for display (当前动作状态，用于显示)
+        self.current_state = "STATIONARY"  # Can be "UP", "DOWN", or "STATIONARY"
+
+        # Anything with an .info() method, e.g. a ROS logger (日志对象，可选)
+        self.logger = logger
+
+    @property
+    def motion_status(self):
+        """Coarse status for display: Lifting, Dropping or Stationary (用于显示的运动状态)"""
+        if self.is_lifting:
+            return "Lifting"
+        if self.is_dropping:
+            return "Dropping"
+        return "Stationary"
+
+    def _log(self, text):
+        if self.logger is not None:
+            self.logger.info(text)
+
+    def push(self, timestamp, accel):
+        """Add one accel sample (x, y, z) and return the events it triggers (处理单个样本)"""
+        self.imu_buffer.append(timestamp, accel)
+        avg_accel_z = float(self.imu_buffer.mean()[self.accel_z_index]) if self.imu_buffer.window_full else None
+        return self.process_sample(timestamp, avg_accel_z)
+
+    def push_batch(self, timestamps, accel):
+        """Add N accel samples, shape (N, 3), and return the events they trigger (批量处理样本)"""
+        events = []
+        step = self.imu_buffer.max_batch
+        for start in range(0, len(timestamps), step):
+            chunk_times = timestamps[start:start + step]
+            self.imu_buffer.extend(chunk_times, accel[start:start + step])
+            means, full = self.imu_buffer.rolling_mean(len(chunk_times))
+            events.extend(self.process_samples(chunk_times, means[:, self.accel_z_index], full))
+        return events
+
+    def ingest(self, timestamps, accel):
+        """Dispatch to `push` or `push_batch` depending on the number of samples"""
+        if len(timestamps) == 1:
+            return self.push(float(timestamps[0]), accel[0])
+        return self.push_batch(timestamps, accel)
+
+    def process_samples(self, timestamps, means_z, full):
+        """
+        Run detection over consecutive samples (对连续样本执行动作检测)
+
+        Instead of stepping the state machine sample by sample, jump straight
+        to the next sample where the current state allows a transition; the
+        result is identical to calling `process_sample` for every sample.
+        """
+        events = []
+        in_band = (self.DROP_THRESHOLD < means_z) & (means_z < self.LIFT_THRESHOLD)
+        out_of_band = (means_z > self.LIFT_THRESHOLD) | (means_z < self.DROP_THRESHOLD)
+        i = 0
+        while i < len(timestamps):
+            if self.last_detection_time is None:
+                self.last_detection_time = timestamps[i]
+            times = timestamps[i:]
+            if self.motion_in_progress:
+                candidates = in_band[i:] & (times - self.motion_start_time > self.MOTION_DURATION)
+            else:
+                candidates = out_of_band[i:] & (times - self.last_detection_time >= self.COOLDOWN_TIME)
+                if not self.is_stationary:
+                    candidates |= in_band[i:]
+            hits = np.flatnonzero(candidates & full[i:])
+            if not len(hits):
+                break
+            i += hits[0]
+            events.extend(self.process_sample(float(timestamps[i]), float(means_z[i])))
+            i += 1
+        return events
+
+    def process_sample(self, timestamp, avg_accel_z):
+        """
+        Run motion detection for the sample at `timestamp` (对单个样本执行动作检测)
+
+        `avg_accel_z` is the detection window mean seen by that sample, or
+        None while the window is still filling.
+        """
+        events = []
+        if self.last_detection_time is None:
+            # Start-up cooldown begins with the first sample (冷却期从第一个样本开始计算)
+            self.last_detection_time = timestamp
+
+        # Detect motion (检测动作)
+        motion = self.detect_motion(timestamp, avg_accel_z)
+        if motion:
+            events.append(MotionEvent(motion, timestamp))
+            self._log(f'Detected motion: {motion}')
+
+            # Update current state for display (更新当前状态用于显示)
+            if motion == "LIFT_START" or motion == "LIFT_COMPLETE":
+                self.current_state = "UP"
+            elif motion == "DROP_START" or motion == "DROP_COMPLETE":
+                self.current_state = "DOWN"
+            elif motion == "STATIONARY":
+                self.current_state = "STATIONARY"
+
+        # Check for stationary state explicitly (明确检查静止状态)
+        if not self.is_lifting and not self.is_dropping and not self.motion_in_progress:
+            if avg_accel_z is not None:
+                if self.DROP_THRESHOLD < avg_accel_z < self.LIFT_THRESHOLD:
+                    if not self.is_stationary:
+                        self.is_stationary = True
+                        self.current_state = "STATIONARY"
+                        events.append(MotionEvent("STATIONARY", timestamp))
+                        self._log("Motion state: STATIONARY")
+        return events
+
+    def detect_motion(self, current_time, avg_accel_z):
+        """Detect lift and drop motions at sample time `current_time` (检测抬起和降下动作)"""
+        # If not enough data points or in cooldown period, don't detect (如果数据点不足或在冷却期内，则不检测)
+        # The window average smooths noise (窗口平均值用于平滑噪声)
+        if avg_accel_z is None or \
+           current_time - self.last_detection_time < self.COOLDOWN_TIME:
+            return None
+
+        # Motion detection logic (动作检测逻辑)
+        if not self.motion_in_progress:
+            # Detect motion start (检测动作开始)
+            if avg_accel_z > self.LIFT_THRESHOLD and not self.is_lifting:
+                self.is_lifting = True
+                self.is_stationary = False
+                self.motion_start_time = current_time
+                self.motion_in_progress = True
+                self._log("Lift motion started")
+                return "LIFT_START"
+            elif avg_accel_z < self.DROP_THRESHOLD and not self.is_dropping:
+                self.is_dropping = True
+                self.is_stationary = False
+                self.motion_start_time = current_time
+                self.motion_in_progress = True
+                self._log("Drop motion started")
+                return "DROP_START"
+        else:
+            # Detect if motion is complete - when acceleration returns to normal range
+            # (检测动作是否完成 - 当加速度恢复到正常范围时)
+            if self.DROP_THRESHOLD < avg_accel_z < self.LIFT_THRESHOLD:
+                motion_duration = current_time - self.motion_start_time
+                if motion_duration > self.MOTION_DURATION:
+                    if self.is_lifting:
+                        self._log(f"Complete lift motion detected! Duration: {motion_duration:.2f}s")
+                        self.is_lifting = False
+                        self.last_detection_time = current_time
+                        self.motion_in_progress = False
+                        return "LIFT_COMPLETE"
+                    elif self.is_dropping:
+                        self._log(f"Complete drop motion detected! Duration: {motion_duration:.2f}s")
+                        self.is_dropping = False
+                        self.last_detection_time = current_time
+                        self.motion_in_progress = False
+                        return "DROP_COMPLETE"
+
+        return None
+
+
+# Display state codes for MultiMotionEngine.current_state (显示状态编码)
+STATES = ("STATIONARY", "UP", "DOWN")
+_STATIONARY, _UP, _DOWN = range(3)
+
+
+class MultiMotionEngine:
+    """
+    The MotionEngine state machine for many IMUs at once (多设备动作检测引擎)
+
+    Per-device state is kept as arrays indexed by device (struct of arrays),
+    and `tick()` evaluates every device's detection window in one vectorized
+    pass. Each device's clock is its own latest sample timestamp, so a tick
+    applies the same rules MotionEngine applies per sample, at the tick's
+    granularity.
+    """
+
+    def __init__(self, n_devices, window_size=10):
+        # Motion detection parameters, shared by all devices (动作检测参数)
+        self.LIFT_THRESHOLD = 1.2
+        self.DROP_THRESHOLD = 0.8
+        self.MOTION_DURATION = 0.3
+        self.COOLDOWN_TIME = 0.5
+
+        self.n_devices = n_devices
+        self.window_size = window_size
+
+        # Detection windows of accel z, one row per device (每个设备一行的检测窗口)
+        self.window = np.zeros((n_devices, window_size))
+        self.window_pos = np.zeros(n_devices, dtype=np.int64)
+        self.window_fill = np.zeros(n_devices, dtype=np.int64)
+        self.window_sum = np.zeros(n_devices)
+        self.latest_time = np.full(n_devices, np.nan)
+
+        # Motion detection state (动作检测状态)
+        self.last_detection_time = np.full(n_devices, np.nan)
+        self.motion_start_time = np.zeros(n_devices)
+        self.is_lifting = np.zeros(n_devices, dtype=bool)
+        self.is_dropping = np.zeros(n_devices, dtype=bool)
+        self.is_stationary = np.ones(n_devices, dtype=bool)
+        self.motion_in_progress = np.zeros(n_devices, dtype=bool)
+        self.current_state = np.full(n_devices, _STATIONARY, dtype=np.int8)
+
+    def push(self, device, timestamps, accel_z):
+        """Add samples for one device; detection happens on the next tick (追加单个设备的样本)"""
+        n = len(timestamps)
+        if n == 0:
+            return
+        if np.isnan(self.last_detection_time[device]):
+            # Start-up cooldown begins with the first sample (冷却期从第一个样本开始计算)
+            self.last_detection_time[device] = timestamps[0]
+
+        w = self.window_size
+        row = self.window[device]
+        if n == 1:
+            pos = self.window_pos[device]
+            self.window_sum[device] += accel_z[0] - row[pos]
+            row[pos] = accel_z[0]
+        else:
+            tail = np.asarray(accel_z[-w:], dtype=np.float64)
+            index = (self.window_pos[device] + np.arange(n - len(tail), n)) % w
+            row[index] = tail
+            self.window_sum[device] = row.sum()
+        self.window_pos[device] = (self.window_pos[device] + n) % w
+        self.window_fill[device] = min(self.window_fill[device] + n, w)
+        self.latest_time[device] = timestamps[-1]
+
+    def tick(self):
+        """Evaluate all devices at once; returns [(device, MotionEvent), ...] (一次性评估所有设备)"""
+        t = self.latest_time
+        full = self.window_fill >= self.window_size
+        mean = self.window_sum / self.window_size
+        in_band = (self.DROP_THRESHOLD < mean) & (mean < self.LIFT_THRESHOLD)
+        with np.errstate(invalid='ignore'):
+            cooled = full & (t - self.last_detection_time >= self.COOLDOWN_TIME)
+            long_enough = t - self.motion_start_time > self.MOTION_DURATION
+
+        # Motion start (动作开始)
+        idle = cooled & ~self.motion_in_progress
+        lift_start = idle & (mean > self.LIFT_THRESHOLD) & ~self.is_lifting
+        drop_start = idle & (mean < self.DROP_THRESHOLD) & ~self.is_dropping & ~lift_start
+        started = lift_start | drop_start
+        self.is_lifting |= lift_start
+        self.is_dropping |= drop_start
+        self.is_stationary &= ~started
+        self.motion_start_time = np.where(started, t, self.motion_start_time)
+
+        # Motion complete: acceleration back in the normal range (动作完成)
+        complete = cooled & self.motion_in_progress & in_band & long_enough
+        lift_complete = complete & self.is_lifting
+        drop_complete = complete & ~self.is_lifting & self.is_dropping
+        completed = lift_complete | drop_complete
+        self.is_lifting &= ~lift_complete
+        self.is_dropping &= ~drop_complete
+        self.last_detection_time = np.where(completed, t, self.last_detection_time)
+        self.motion_in_progress = (self.motion_in_progress | started) & ~completed
+
+        self.current_state[lift_start | lift_complete] = _UP
+        self.current_state[drop_start | drop_complete] = _DOWN
+
+        # Explicit stationary check (明确检查静止状态)
+        stationary = (full & in_band & ~self.is_stationary & ~self.is_lifting
+                      & ~self.is_dropping & ~self.motion_in_progress)
+        self.is_stationary |= stationary
+        self.current_state[stationary] = _STATIONARY
+
+        events = []
+        for motion, mask in (("LIFT_START", lift_start), ("DROP_START", drop_start),
+                             ("LIFT_COMPLETE", lift_complete), ("DROP_COMPLETE", drop_complete),
+                             ("STATIONARY", stationary)):
+            for device in np.flatnonzero(mask):
+                events.append((int(device), MotionEvent(motion, float(t[device]))))
+        # Per device, keep the order MotionEngine would emit them in
+        events.sort(key=lambda item: item[0])
+        return events
@@ -5,47 +5,42 @@ Simplified Motion Detector for MPU9250
 - Detection of lift, drop, and stationary states
 - English UI with Chinese comments
 """
+import argparse
+import subprocess
+import sys
 import rclpy
 from rclpy.node import Node
-from std_msgs.msg import String
+from rclpy.utilities import remove_ros_args
+from std_msgs.msg import String, UInt8MultiArray
 import json
-import time
-from collections import deque
-import matplotlib.pyplot as plt
-import numpy as np
+import os
 import threading
+import numpy as np
+from gesture_dtw import GestureLibrary, GestureMatcher
+from imu_codec import decode_imu_payload
+from imu_features import FeatureExtractor, FeatureStage, warn_empty_bands
+from motion_engine import MotionEngine
+from shm_ring import SharedImuRing
 
 class MotionDetector(Node):
     def __init__(self):
         super().__init__('motion_detector')
         
-        # Motion detection parameters (动作检测参数)
-        self.LIFT_THRESHOLD = 1.2     # Lift threshold: >1.2g (抬起阈值)
-        self.DROP_THRESHOLD = 0.8     # Drop threshold: <0.8g (降下阈值)
-        self.MOTION_DURATION = 0.3    # Motion duration threshold in seconds (动作持续时间阈值)
-        self.COOLDOWN_TIME = 0.5      # Cooldown time between detections (两次检测之间的冷却时间)
-        
-        # Buffer for storing data for detection (用于检测的数据缓冲区)
-        self.window_size = 10
-        self.accel_z_buffer = deque(maxlen=self.window_size)
-        
-        # Buffer for visualization (用于可视化的数据缓冲区)
-        self.data_length = 200
-        self.time_buffer = deque(maxlen=self.data_length)
-        self.accel_x_buffer = deque(maxlen=self.data_length)
-        self.accel_y_buffer = deque(maxlen=self.data_length)
-        self.accel_z_buffer_vis = deque(maxlen=self.data_length)
+        # Detection runs in a ROS-free engine driven by sample timestamps
+        # (检测逻辑位于与ROS无关的引擎中，由样本时间戳驱动)
+        self.engine = MotionEngine(logger=self.get_logger())
         
-        # Motion detection state (动作检测状态)
-        self.last_detection_time = time.time()
-        self.motion_start_time = 0
-        self.is_lifting = False
-        self.is_dropping = False
-        self.is_stationary = True
-        self.motion_in_progress = False
-        
-        # Current motion state for display (当前动作状态，用于显示)
-        self.current_state = "STATIONARY"  # Can be "UP", "DOWN", or "STATIONARY"
+        # Optional DTW gesture recognition against a template library
+        # (可选：基于DTW模板库的手势识别)
+        self.gesture_matcher = None
+        library_path = self.declare_parameter('gesture_library', '').value
+        if library_path:
+            library = GestureLibrary.load(library_path)
+            self.gesture_matcher = GestureMatcher(
+                library,
+                hop=self.declare_parameter('gesture_hop', 10).value,
+                threshold=self.declare_parameter('gesture_threshold', 1.0).value)
+            self.get_logger().info(f'Loaded {len(library)} gesture templates from {library_path}')
         
         # Create subscriber (创建订阅者)
         self.subscription = self.create_subscription(
@@ -54,6 +49,14 @@ class MotionDetector(Node):
             self.data_callback,
             10)
         
+        # Binary IMU frames (see imu_codec.py) go through the same callback;
+        # the wire format is detected from the payload (二进制IMU帧，自动识别格式)
+        self.subscription_bin = self.create_subscription(
+            UInt8MultiArray,
+            'imu/all_data_bin',
+            self.data_callback,
+            10)
+        
         # Create publisher for detection results (创建发布者用于发布检测结果)
         self.motion_pub = self.create_publisher(
             String,
@@ -63,230 +66,194 @@ class MotionDetector(Node):
         # Create mutex for thread synchronization (创建互斥锁用于线程同步)
         self.data_lock = threading.Lock()
         
-        # Create event loop timer for updating data processing (创建事件循环定时器用于更新数据处理)
-        self.timer = self.create_timer(0.05, self.timer_callback)
+        # Windowed spectral features, published at a low rate instead of raw
+        # samples (以低频率发布窗口频谱特征，代替原始样本); off by default (0)
+        self.feature_stage = None
+        self.features_checked = False
+        features_rate = self.declare_parameter('features_rate', 0.0).value
+        if features_rate > 0:
+            self.feature_stage = FeatureStage(FeatureExtractor(
+                window=self.declare_parameter('features_window', 128).value,
+                step=self.declare_parameter('features_step', 64).value))
+            self.features_pub = self.create_publisher(String, 'imu/features', 10)
+            self.features_timer = self.create_timer(1.0 / features_rate, self.features_callback)
+        
+        # Optional shared-memory ring feeding an out-of-process viewer
+        # (可选：向独立查看器进程输出数据的共享内存环)
+        self.shared_ring = None
         
         self.get_logger().info('Motion detector initialized')
     
     def data_callback(self, msg):
-        """Process received IMU data (处理接收到的IMU数据)"""
+        """
+        Process received IMU data (处理接收到的IMU数据)
+        
+        Accepts a single sample, {'accel': {'x': 0.1, ...}, 'timestamp': t},
+        a batch carrying the same keys as columnar arrays,
+        {'accel': {'x': [...], ...}, 'timestamp': [...]}, or a binary frame.
+        Every sample is evaluated as it arrives (每个样本到达时立即检测).
+        """
         try:
-            data = json.loads(msg.data)
-            
-            # Get acceleration data (获取加速度数据)
-            accel_x = data['accel']['x']
-            accel_y = data['accel']['y']
-            accel_z = data['accel']['z']
-            timestamp = data['timestamp']
-            
-            # Update data buffers (更新数据缓冲区)
+            frame = decode_imu_payload(msg.data)
+            accel = frame.values[:, :3]
             with self.data_lock:
-                self.accel_z_buffer.append(accel_z)
-                
-                # Update visualization data (更新可视化数据)
-                self.time_buffer.append(timestamp)
-                self.accel_x_buffer.append(accel_x)
-                self.accel_y_buffer.append(accel_y)
-                self.accel_z_buffer_vis.append(accel_z)
+                events = self.engine.ingest(frame.timestamps, accel)
+                if self.feature_stage is not None:
+                    self.feature_stage.push(frame.timestamps, accel)
+                gesture = None
+                if self.gesture_matcher is not None:
+                    gesture = self.gesture_matcher.update(self.engine.imu_buffer)
+            if self.shared_ring is not None:
+                # Lock-free hand-off to the viewer process (无锁交给查看器进程)
+                self.shared_ring.write(np.column_stack((frame.timestamps, accel)),
+                                       self.engine.current_state, self.engine.motion_status)
+            for event in events:
+                self.publish_motion(event.motion, event.timestamp)
+            if gesture is not None:
+                self.publish_motion('GESTURE', gesture.timestamp,
+                                    gesture=gesture.gesture, distance=gesture.distance)
+                self.get_logger().info(f'Detected gesture: {gesture.gesture} ({gesture.distance:.3f})')
         
         except Exception as e:
             self.get_logger().error(f'Processing data failed: {e}')
     
-    def timer_callback(self):
-        """Periodically process and detect motions (定期处理和检测动作)"""
-        # Detect motion (检测动作)
-        motion = self.detect_motion()
-        if motion:
-            # Publish detection result (发布检测结果)
-            result_msg = String()
-            result_msg.data = motion
-            self.motion_pub.publish(result_msg)
-            self.get_logger().info(f'Detected motion: {motion}')
-            
-            # Update current state for display (更新当前状态用于显示)
-            if motion == "LIFT_START" or motion == "LIFT_COMPLETE":
-                self.current_state = "UP"
-            elif motion == "DROP_START" or motion == "DROP_COMPLETE":
-                self.current_state = "DOWN"
-            elif motion == "STATIONARY":
-                self.current_state = "STATIONARY"
-        
-        # Check for stationary state explicitly (明确检查静止状态)
-        if not self.is_lifting and not self.is_dropping and not self.motion_in_progress:
-            if len(self.accel_z_buffer) >= self.window_size:
-                avg_accel_z = sum(self.accel_z_buffer) / len(self.accel_z_buffer)
-                if self.DROP_THRESHOLD < avg_accel_z < self.LIFT_THRESHOLD:
-                    if not self.is_stationary:
-                        self.is_stationary = True
-                        self.current_state = "STATIONARY"
-                        self.motion_pub.publish(String(data="STATIONARY"))
-                        self.get_logger().info("Motion state: STATIONARY")
+    def publish_motion(self, motion, timestamp, **extra):
+        """
+        Publish a detection event tagged with the timestamp of the sample
+        that triggered it (发布检测事件，附带触发样本的时间戳)
+        """
+        result_msg = String()
+        result_msg.data = json.dumps({'motion': motion, 'timestamp': timestamp, **extra})
+        self.motion_pub.publish(result_msg)
     
-    def detect_motion(self):
-        """Detect lift and drop motions (检测抬起和降下动作)"""
-        current_time = time.time()
-        
-        # If not enough data points or in cooldown period, don't detect (如果数据点不足或在冷却期内，则不检测)
-        if len(self.accel_z_buffer) < self.window_size or \
-           current_time - self.last_detection_time < self.COOLDOWN_TIME:
-            return None
-        
-        # Use average to smooth noise (使用平均值来平滑噪声)
-        avg_accel_z = sum(self.accel_z_buffer) / len(self.accel_z_buffer)
-        
-        # Motion detection logic (动作检测逻辑)
-        if not self.motion_in_progress:
-            # Detect motion start (检测动作开始)
-            if avg_accel_z > self.LIFT_THRESHOLD and not self.is_lifting:
-                self.is_lifting = True
-                self.is_stationary = False
-                self.motion_start_time = current_time
-                self.motion_in_progress = True
-                self.get_logger().info("Lift motion started")
-                return "LIFT_START"
-            elif avg_accel_z < self.DROP_THRESHOLD and not self.is_dropping:
-                self.is_dropping = True
-                self.is_stationary = False
-                self.motion_start_time = current_time
-                self.motion_in_progress = True
-                self.get_logger().info("Drop motion started")
-                return "DROP_START"
-        else:
-            # Detect if motion is complete - when acceleration returns to normal range
-            # (检测动作是否完成 - 当加速度恢复到正常范围时)
-            if self.DROP_THRESHOLD < avg_accel_z < self.LIFT_THRESHOLD:
-                motion_duration = current_time - self.motion_start_time
-                if motion_duration > self.MOTION_DURATION:
-                    if self.is_lifting:
-                        self.get_logger().info(f"Complete lift motion detected! Duration: {motion_duration:.2f}s")
-                        self.is_lifting = False
-                        self.last_detection_time = current_time
-                        self.motion_in_progress = False
-                        return "LIFT_COMPLETE"
-                    elif self.is_dropping:
-                        self.get_logger().info(f"Complete drop motion detected! Duration: {motion_duration:.2f}s")
-                        self.is_dropping = False
-                        self.last_detection_time = current_time
-                        self.motion_in_progress = False
-                        return "DROP_COMPLETE"
-        
-        return None
+    def features_callback(self):
+        """Publish features of the samples received since the last tick (发布特征汇总)"""
+        try:
+            with self.data_lock:
+                samples = self.feature_stage.take()
+            if samples is None:
+                return
+            # The FFTs run outside the lock (在锁外计算FFT)
+            summary = self.feature_stage.summarize(samples)
+            if summary is None:
+                return
+            if not self.features_checked:
+                # The sample rate is only known once data arrives (采样率需由数据得出)
+                self.features_checked = True
+                warn_empty_bands(self.get_logger(), self.feature_stage.extractor, summary['sample_rate'])
+            msg = String()
+            msg.data = json.dumps(summary)
+            self.features_pub.publish(msg)
+        except Exception as e:
+            self.get_logger().error(f'Feature extraction failed: {e}')
     
-    def get_visualization_data(self):
-        """Get copy of visualization data (获取可视化数据的副本)"""
+    def plot_source(self, cursor):
+        """
+        Samples written since `cursor` plus the current state, for LivePlot
+        (返回自cursor以来的新样本及当前状态，供绘图使用)
+        """
         with self.data_lock:
-            if not self.time_buffer:
-                return None
-            
-            # Calculate relative times (first data point as 0) (计算相对时间，以第一个数据点为0)
-            times = list(self.time_buffer)
-            relative_times = [(t - times[0]) for t in times]
-            
-            return {
-                'times': relative_times,
-                'accel_x': list(self.accel_x_buffer),
-                'accel_y': list(self.accel_y_buffer),
-                'accel_z': list(self.accel_z_buffer_vis),
-                'state': self.current_state
-            }
+            rows, cursor = self.engine.imu_buffer.since(cursor)
+            return rows, cursor, self.engine.motion_status, self.engine.current_state
+
+def parse_args(argv=None):
+    """Parse detector options; ROS arguments are left for rclpy (解析命令行参数)"""
+    argv = sys.argv if argv is None else argv
+    parser = argparse.ArgumentParser(description='MPU9250 motion detector')
+    parser.add_argument('--plot-fps', type=float, default=20.0,
+                        help='maximum plot redraw rate, independent of the sensor rate')
+    parser.add_argument('--plot-span', type=float, default=5.0,
+                        help='seconds of data shown in the plot')
+    parser.add_argument('--shm-viewer', action='store_true',
+                        help='plot in a separate viewer process fed through shared memory')
+    parser.add_argument('--shm-name', default='glove_imu',
+                        help='name of the shared-memory ring used by --shm-viewer')
+    parser.add_argument('--headless', action='store_true',
+                        help='detection only, no plot; matplotlib is never imported')
+    return parser.parse_args(remove_ros_args(argv)[1:])
+
+def run_headless(detector):
+    """Spin the detector in the main thread without any plotting (无界面运行)"""
+    try:
+        rclpy.spin(detector)
+    except KeyboardInterrupt:
+        print("User interrupted, shutting down...")
+    finally:
+        detector.destroy_node()
+        rclpy.shutdown()
 
-def update_plot(detector, fig, ax, lines, motion_text, status_text):
-    """Update plot with latest data (使用最新数据更新图表)"""
-    data = detector.get_visualization_data()
-    if data is None:
+def run_with_shm_viewer(detector, options):
+    """
+    Spin the detector in the main thread and plot from a separate process
+    (主线程运行检测，绘图在独立进程中进行)
+    """
+    try:
+        ring = SharedImuRing.create(options.shm_name)
+    except FileExistsError as e:
+        detector.get_logger().error(str(e))
+        detector.destroy_node()
+        rclpy.shutdown()
         return
-    
-    # Update line data (更新线条数据)
-    lines[0].set_data(data['times'], data['accel_x'])
-    lines[1].set_data(data['times'], data['accel_y'])
-    lines[2].set_data(data['times'], data['accel_z'])
-    
-    # Update x-axis range (更新x轴范围)
-    if data['times']:
-        ax.set_xlim(max(0, data['times'][-1] - 5), data['times'][-1] + 0.5)
-    
-    # Update status text (更新状态文本)
-    status = "Motion status: "
-    if detector.is_lifting:
-        status += "Lifting"
-    elif detector.is_dropping:
-        status += "Dropping"
-    else:
-        status += "Stationary"
-    status_text.set_text(status)
-    
-    # Update motion state display (更新动作状态显示)
-    motion_text.set_text(data['state'])
-    
-    # Change text color based on state (根据状态更改文本颜色)
-    if data['state'] == "UP":
-        motion_text.set_color('red')
-    elif data['state'] == "DOWN":
-        motion_text.set_color('blue')
-    else:  # STATIONARY
-        motion_text.set_color('green')
-    
-    # Draw plot (绘制图表)
-    fig.canvas.draw_idle()
-    plt.pause(0.01)
+    detector.shared_ring = ring
+    viewer = subprocess.Popen([
+        sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'imu_viewer.py'),
+        '--shm-name', options.shm_name,
+        '--plot-fps', str(options.plot_fps),
+        '--plot-span', str(options.plot_span),
+        '--lift-threshold', str(detector.engine.LIFT_THRESHOLD),
+        '--drop-threshold', str(detector.engine.DROP_THRESHOLD),
+    ])
+    try:
+        rclpy.spin(detector)
+    except KeyboardInterrupt:
+        print("User interrupted, shutting down...")
+    finally:
+        viewer.terminate()
+        try:
+            # Reap the viewer so it does not linger as a zombie (回收查看器进程)
+            viewer.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            viewer.kill()
+            viewer.wait()
+        detector.shared_ring = None
+        ring.close()
+        detector.destroy_node()
+        rclpy.shutdown()
 
 def main(args=None):
+    options = parse_args(args)
     rclpy.init(args=args)
     
     # Create the detector node
     detector = MotionDetector()
     
+    if options.headless:
+        run_headless(detector)
+        return
+    
+    if options.shm_viewer:
+        run_with_shm_viewer(detector, options)
+        return
+    
     # Setup thread for ROS2 processing
     ros_thread = threading.Thread(target=lambda: rclpy.spin(detector))
     ros_thread.daemon = True
     ros_thread.start()
     
-    # Setup plot in the main thread
-    fig, ax = plt.subplots(figsize=(10, 6))
-    ax.set_title('MPU9250 Acceleration Data and Motion Detection')
-    ax.set_xlabel('Time (s)')
-    ax.set_ylabel('Acceleration (g)')
-    ax.grid(True)
-    
-    # Create line objects (创建线条对象)
-    line_x, = ax.plot([], [], 'r-', label='X-axis')
-    line_y, = ax.plot([], [], 'g-', label='Y-axis')
-    line_z, = ax.plot([], [], 'b-', label='Z-axis')
-    lines = [line_x, line_y, line_z]
-    
-    # Add threshold lines (添加阈值线)
-    ax.axhline(y=detector.LIFT_THRESHOLD, color='m', linestyle='--', label='Lift Threshold')
-    ax.axhline(y=detector.DROP_THRESHOLD, color='c', linestyle='--', label='Drop Threshold')
-    
-    # Add legend (添加图例)
-    ax.legend()
-    
-    # Set y-axis range (设置y轴范围)
-    ax.set_ylim(-2, 2)
-    
-    # Initialize text annotation (初始化文本注释)
-    status_text = ax.text(0.02, 0.95, '', transform=ax.transAxes, 
-                        bbox=dict(facecolor='white', alpha=0.5))
-    
-    # Add motion state display (添加动作状态显示)
-    motion_text = ax.text(0.5, 0.5, 'STATIONARY', 
-                        transform=ax.transAxes,
-                        fontsize=20, ha='center', va='center',
-                        bbox=dict(facecolor='white', alpha=0.7))
+    # Setup plot in the main thread (在主线程中设置图表)
+    from live_plot import LivePlot
+    plot = LivePlot(detector.engine.LIFT_THRESHOLD, detector.engine.DROP_THRESHOLD,
+                    span=options.plot_span, max_fps=options.plot_fps)
     
     try:
-        plt.show(block=False)
-        
-        while plt.fignum_exists(fig.number):
-            update_plot(detector, fig, ax, lines, motion_text, status_text)
-            plt.pause(0.05)  # Small pause to allow GUI to update
+        plot.run(detector.plot_source)
             
     except KeyboardInterrupt:
         print("User interrupted, shutting down...")
     except Exception as e:
         print(f"Error in visualization: {e}")
     finally:
-        plt.close(fig)
+        plot.close()
         detector.destroy_node()
         rclpy.shutdown()
 
@@ -5,7 +5,10 @@ import random
 import socket
 import os
 import threading
+from collections import deque
 import paho.mqtt.client as mqtt
+from outbox import paho_outbox
+from mqtt_batch import BatchPublisher
 
 # -------------------------------
 # New: Import ROS related modules for subscribing to ROS topics in MQTT scripts
@@ -26,6 +29,37 @@ updateInterval = 6000
 # File to store configuration (simulating Preferences)
 PREFS_FILE = "esp32-data.json"
 
+MQTT_KEEPALIVE = 60  # Seconds
+
+# Readings that could not be published are kept here until the broker is back
+OUTBOX_FILE = "mqtt-outbox.db"
+outbox = None  # Outbox, created by run_mqtt
+stop_requested = threading.Event()  # Set by stop_mqtt to end run_mqtt from another thread
+
+# ROS topics forwarded to MQTT as soon as a message arrives (event-driven bridge)
+#   format       : how the ROS JSON is turned into the MQTT payload (see PAYLOAD_FORMATS)
+#   min_interval : minimum seconds between two publishes of one mapping, 0 = no limit
+#   coalesce     : while rate limited keep only the newest message (latest wins);
+#                  otherwise queue up to max_pending messages and send them at the limit
+#   batch        : collect readings into one message (see mqtt_batch.py), flushed at
+#                  max_readings or after max_delay seconds; replaces the rate limit
+TOPIC_MAPPINGS = [
+    {
+        "ros_topic": "GUI",
+        "mqtt_topic": mqtt_data_topic,
+        "format": "gui",
+        "min_interval": 0.2,
+        "coalesce": True,
+        "max_pending": 50,
+    },
+    {
+        "ros_topic": "force/event",
+        "mqtt_topic": mqtt_data_topic,
+        "format": "reading",
+        "batch": {"max_readings": 20, "max_delay": 1.0},
+    },
+]
+
 
 def load_preferences():
     global updateInterval
@@ -103,23 +137,34 @@ class GuiSubscriber(Node):
         self.subscription = self.create_subscription(
             ROSString,
             'GUI',
-            self.gui_callback,
+            lambda msg: self.topic_callback('GUI', msg),
             10
         )
+        # Any other ROS topic listed in TOPIC_MAPPINGS
+        self.subscriptions_bridge = [
+            self.create_subscription(ROSString, topic, lambda msg, topic=topic: self.topic_callback(topic, msg), 10)
+            for topic in sorted({m["ros_topic"] for m in TOPIC_MAPPINGS} - {'GUI'})
+        ]
         self.latest_gui_data = None  # store newest GUI data
+        self.bridge = None  # MqttBridge forwarding messages as they arrive, set by run_mqtt
 
-    def gui_callback(self, msg: ROSString):
+    def topic_callback(self, topic, msg: ROSString):
         try:
             data = json.loads(msg.data)  # Parsing JSON data posted by GUI
-            self.latest_gui_data = data
-            self.get_logger().info(f"Received GUI data: {data}")
         except Exception as e:
-            self.get_logger().error("Error parsing GUI message: " + str(e))
+            self.get_logger().error(f"Error parsing {topic} message: " + str(e))
+            return
+        if topic == 'GUI':
+            self.latest_gui_data = data
+        self.get_logger().info(f"Received {topic} data: {data}")
+        bridge = self.bridge
+        if bridge is not None:
+            bridge.forward(topic, data)
 # -------------------------------
 
 # Modification: The original publish_data function adds the GUI data part.
 # Here we extract the contents of the GUI data separately and display them independently as gui-click, gui-motion, gui-channel
-def publish_data(client, gui_data):
+def build_gui_payload(gui_data):
     generatedNumber = random.randint(0, 999)
     # If there is GUI data, extract each field separately; otherwise use "error"
     if gui_data is not None:
@@ -143,27 +188,172 @@ def publish_data(client, gui_data):
             "gui-channel": gui_channel    # NEW: GUI channel status: "1", "2", "3"
         }
     }
+    return payload
+
+
+# Payload builders selectable by "format" in TOPIC_MAPPINGS
+PAYLOAD_FORMATS = {
+    "gui": build_gui_payload,
+    "raw": lambda data: data,
+    "reading": lambda data: {"device_id": device_id, "timestamp": int(time.time() * 1000), "data": data},
+}
+
+
+def mqtt_send(client, topic, payload_str):
+    return client.is_connected() and client.publish(topic, payload_str).rc == mqtt.MQTT_ERR_SUCCESS
+
+
+def publish_payload(client, topic, payload):
     payload_str = json.dumps(payload)
-    result = client.publish(mqtt_data_topic, payload_str)
-    if result.rc == mqtt.MQTT_ERR_SUCCESS:
+    if outbox is None:
+        sent = mqtt_send(client, topic, payload_str)
+    else:
+        sent = outbox.publish(topic, payload_str)
+    if sent:
         print("Data published:", payload_str)
+    elif outbox is None:
+        print("Data publish failed, broker not connected")
     else:
-        print("Data publish failed, error code:", result.rc)
+        print("Broker unavailable, data stored in outbox, depth:", outbox.depth)
 
 
-def main():
-    global updateInterval
+def publish_data(client, gui_data):
+    publish_payload(client, mqtt_data_topic, build_gui_payload(gui_data))
 
-    load_preferences()
 
-    # -------------------------------
-    # New: Initialize ROS and create a GUI subscription node to receive messages from the GUI on ROS
-    rclpy.init()
-    gui_subscriber = GuiSubscriber()
-    ros_thread = threading.Thread(target=rclpy.spin, args=(gui_subscriber,), daemon=True)
-    ros_thread.start()
-    # -------------------------------
+class BridgeRoute:
+    """One TOPIC_MAPPINGS entry plus its rate-limit state"""
+
+    def __init__(self, mapping):
+        self.ros_topic = mapping["ros_topic"]
+        self.mqtt_topic = mapping["mqtt_topic"]
+        self.format = PAYLOAD_FORMATS[mapping.get("format", "raw")]
+        self.min_interval = mapping.get("min_interval", 0.0)
+        self.coalesce = mapping.get("coalesce", True)
+        self.pending = deque(maxlen=1 if self.coalesce else mapping.get("max_pending", 50))
+        self.next_allowed = 0.0  # time.monotonic() of the earliest next publish
+        batch = mapping.get("batch")
+        self.batch = None if batch is None else BatchPublisher(device_id, **batch)
+
+
+class MqttBridge:
+    """
+    Forwards ROS messages to MQTT as soon as they arrive, within each
+    mapping's rate limit, and runs the periodic telemetry on a monotonic
+    schedule that does not drift: ticks stay on start + k * interval, and
+    ticks missed while busy are skipped rather than bunched up.
+
+    forward() only queues the message and wakes the scheduler; every
+    publish, and so every outbox write and drain, happens on the thread
+    running run(). The ROS executor (or the Tk thread, when the GUI is
+    composed into the same process) never waits on the network or disk.
+    """
+
+    def __init__(self, client, mappings=TOPIC_MAPPINGS, outbox=None):
+        self.client = client
+        self.outbox = outbox  # Drained from the scheduler loop while it holds messages
+        self.routes = [BridgeRoute(mapping) for mapping in mappings]
+        self.condition = threading.Condition()
+        self.running = True
+        self.changed = False  # Set by forward() so the scheduler re-plans before sleeping
+        self.stats = {"forwarded": 0, "coalesced": 0, "dropped": 0, "batches": 0, "telemetry": 0}
+
+    def forward(self, ros_topic, data):
+        """Called from the ROS thread for every message on a mapped topic; never publishes"""
+        with self.condition:
+            now = time.monotonic()
+            for route in self.routes:
+                if route.ros_topic != ros_topic:
+                    continue
+                if route.batch is not None:
+                    route.batch.add(route.format(data), now)
+                    continue
+                if len(route.pending) == route.pending.maxlen:
+                    self.stats["coalesced" if route.coalesce else "dropped"] += 1
+                route.pending.append(data)
+            self.changed = True
+            self.condition.notify()
+
+    def _take(self, route, data, now):
+        route.next_allowed = now + route.min_interval
+        self.stats["forwarded"] += 1
+        return route.mqtt_topic, route.format(data)
 
+    def _take_batch(self, route):
+        self.stats["batches"] += 1
+        return route.mqtt_topic, route.batch.flush()
+
+    def _publish(self, sends):
+        for topic, payload in sends:
+            publish_payload(self.client, topic, payload)
+
+    def flush(self):
+        """Publish every partially filled batch now; called once run() has returned"""
+        with self.condition:
+            sends = [self._take_batch(route) for route in self.routes
+                     if route.batch is not None and len(route.batch)]
+        self._publish(sends)
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            self.condition.notify()
+
+    def run(self, telemetry, interval):
+        """
+        Blocking scheduler: flushes rate-limited messages and batches when
+        they are due and calls telemetry() every interval() seconds
+        """
+        period = interval()
+        next_tick = time.monotonic() + period
+        while True:
+            sends = []
+            tick = False
+            with self.condition:
+                if not self.running:
+                    break
+                self.changed = False
+                now = time.monotonic()
+                for route in self.routes:
+                    if route.pending and now >= route.next_allowed:
+                        sends.append(self._take(route, route.pending.popleft(), now))
+                    if route.batch is not None and (
+                            len(route.batch) >= route.batch.max_readings or route.batch.due(now)):
+                        sends.append(self._take_batch(route))
+
+                # The interval can change at runtime through the config topic
+                if interval() != period:
+                    period = interval()
+                    next_tick = now + period
+                if now >= next_tick:
+                    tick = True
+                    self.stats["telemetry"] += 1
+                    missed = int((now - next_tick) // period)
+                    next_tick += (missed + 1) * period
+
+                wake = min([next_tick]
+                           + [r.next_allowed for r in self.routes if r.pending]
+                           + [r.batch.deadline for r in self.routes if r.batch is not None and len(r.batch)])
+
+            self._publish(sends)
+            if tick:
+                telemetry()
+            if self.outbox is not None and (self.outbox.depth or self.outbox.inflight):
+                self.outbox.drain()
+                wake = min(wake, now + self.outbox.drain_interval)
+
+            with self.condition:
+                # Skip the wait if forward() queued something meanwhile
+                if self.running and not self.changed:
+                    self.condition.wait(max(0.0, wake - time.monotonic()))
+
+
+def run_mqtt(gui_subscriber):
+    """
+    Connect to the broker, forward mapped ROS messages as they arrive and
+    publish the latest GUI data every updateInterval, until interrupted
+    """
+    global outbox
     # Resolve MQTT broker IP (if local system supports mDNS resolution, it will be used)
     broker_ip = resolve_mqtt_broker()
 
@@ -173,32 +363,65 @@ def main():
     client.on_message = on_message
 
     # Attempt to connect to MQTT broker
-    while True:
+    while not stop_requested.is_set():
         try:
             print("Attempting to connect to MQTT broker...")
-            client.connect(broker_ip, port=1883, keepalive=60)
+            client.connect(broker_ip, port=1883, keepalive=MQTT_KEEPALIVE)
             break
         except Exception as e:
             print("MQTT connection error:", e)
-            time.sleep(2)
+            stop_requested.wait(2)
+    else:
+        return
 
     # Start background thread for MQTT network loop
     client.loop_start()
 
-    last_publish_time = time.time() * 1000  # 毫秒计时器
+    # A broker that vanished silently is noticed after 1.5 keepalives; past
+    # that, anything still unacknowledged is stored and sent again
+    outbox = paho_outbox(OUTBOX_FILE, client, ack_timeout=2 * MQTT_KEEPALIVE)
+    bridge = MqttBridge(client, outbox=outbox)
+    gui_subscriber.bridge = bridge
+    if stop_requested.is_set():
+        bridge.stop()
     try:
-        while True:
-            current_time = time.time() * 1000
-            if current_time - last_publish_time >= updateInterval:
-                last_publish_time = current_time
-                # Modification: In each release cycle, take the latest GUI data and publish it together with the random number data
-                publish_data(client, gui_subscriber.latest_gui_data)
-            time.sleep(0.1)
+        # Modification: In each release cycle, take the latest GUI data and publish it together with the random number data
+        bridge.run(lambda: publish_data(client, gui_subscriber.latest_gui_data),
+                   lambda: updateInterval / 1000.0)
     except KeyboardInterrupt:
         print("Exiting program...")
     finally:
+        gui_subscriber.bridge = None
+        bridge.flush()
+        print("Outbox:", outbox.metrics())
         client.loop_stop()
         client.disconnect()
+        outbox.close()
+        outbox = None
+
+
+def stop_mqtt(gui_subscriber):
+    """Make run_mqtt, running on another thread, flush and return"""
+    stop_requested.set()
+    bridge = gui_subscriber.bridge
+    if bridge is not None:
+        bridge.stop()
+
+
+def main():
+    load_preferences()
+
+    # -------------------------------
+    # New: Initialize ROS and create a GUI subscription node to receive messages from the GUI on ROS
+    rclpy.init()
+    gui_subscriber = GuiSubscriber()
+    ros_thread = threading.Thread(target=rclpy.spin, args=(gui_subscriber,), daemon=True)
+    ros_thread.start()
+    # -------------------------------
+
+    try:
+        run_mqtt(gui_subscriber)
+    finally:
         # shutdown ROS node
         rclpy.shutdown()
 
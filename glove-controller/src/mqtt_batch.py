@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Batched MQTT payloads: many readings of one device in a single message.
+
+A single reading is published as
+    {"device_id": ..., "timestamp": ms, "data": {...}}
+A batch keeps that header once and stores the readings column-wise:
+    {"device_id": ..., "timestamp": ms of the newest reading,
+     "batch": {"count": n, "timestamps": [ms, ...], "data": {key: [v, ...], ...}}}
+A key missing from a reading is stored as null in its column, and the
+reading's index is listed under "missing" so it is not confused with a
+reading whose value really is null:
+    "batch": {..., "missing": {key: [i, ...], ...}}
+"missing" is left out when every reading has every key.
+
+BatchPublisher collects readings and hands out a batch once `max_readings`
+are waiting or the oldest one has waited `max_delay` seconds. Ingestion code
+calls `unpack_batch` to get the single-reading documents back; it accepts
+unbatched documents too, so both can share a topic.
+"""
+import json
+import time
+
+
+def pack_batch(device_id, timestamps, readings):
+    keys = []
+    for data in readings:
+        keys.extend(key for key in data if key not in keys)
+    batch = {
+        "count": len(timestamps),
+        "timestamps": list(timestamps),
+        "data": {key: [data.get(key) for data in readings] for key in keys},
+    }
+    missing = {}
+    for key in keys:
+        indices = [i for i, data in enumerate(readings) if key not in data]
+        if indices:
+            missing[key] = indices
+    if missing:
+        batch["missing"] = missing
+    return {"device_id": device_id, "timestamp": timestamps[-1], "batch": batch}
+
+
+def unpack_batch(payload):
+    """Single-reading documents of a batched or plain payload (str, bytes or dict)"""
+    if isinstance(payload, (str, bytes)):
+        payload = json.loads(payload)
+    batch = payload.get("batch")
+    if batch is None:
+        return [payload]
+    columns = batch["data"]
+    missing = {key: set(indices) for key, indices in batch.get("missing", {}).items()}
+    return [
+        {
+            "device_id": payload["device_id"],
+            "timestamp": timestamp,
+            "data": {key: values[i] for key, values in columns.items()
+                     if i not in missing.get(key, ())},
+        }
+        for i, timestamp in enumerate(batch["timestamps"])
+    ]
+
+
+class BatchPublisher:
+    def __init__(self, device_id, max_readings=50, max_delay=1.0):
+        self.device_id = device_id
+        self.max_readings = max_readings  # Flush once this many readings are waiting
+        self.max_delay = max_delay        # Longest a reading waits, in seconds
+        self.timestamps = []
+        self.readings = []
+        self.deadline = None              # time.monotonic() by which to flush
+        self.batches = 0
+        self.batched = 0
+
+    def __len__(self):
+        return len(self.readings)
+
+    def add(self, document, now=None):
+        """Queue one single-reading document; returns True once the batch is full"""
+        if not self.readings:
+            self.deadline = (time.monotonic() if now is None else now) + self.max_delay
+        self.timestamps.append(document["timestamp"])
+        self.readings.append(document["data"])
+        return len(self.readings) >= self.max_readings
+
+    def due(self, now=None):
+        return self.deadline is not None and (time.monotonic() if now is None else now) >= self.deadline
+
+    def flush(self):
+        """Batch payload of everything waiting, or None if nothing is"""
+        if not self.readings:
+            return None
+        payload = pack_batch(self.device_id, self.timestamps, self.readings)
+        self.batches += 1
+        self.batched += len(self.readings)
+        self.timestamps, self.readings, self.deadline = [], [], None
+        return payload
+
+
+def _benchmark(n_readings=5000, batch=50):
+    readings = [{"device_id": "device", "timestamp": 1700000000000 + 10 * i,
+                 "data": {"click": "pressed", "motion": "lifting", "force": 20000 + i}}
+                for i in range(n_readings)]
+    single = sum(len(json.dumps(reading)) for reading in readings)
+
+    publisher = BatchPublisher("device", max_readings=batch)
+    batched, messages = 0, []
+    for reading in readings:
+        if publisher.add(reading):
+            messages.append(json.dumps(publisher.flush()))
+    batched = sum(len(message) for message in messages)
+    assert [r for m in messages for r in unpack_batch(m)] == readings
+
+    print(f"{n_readings} readings")
+    print(f"  one per message  : {n_readings:5d} messages, {single / n_readings:6.1f} bytes/reading")
+    print(f"  batches of {batch:<5d}: {len(messages):5d} messages, {batched / n_readings:6.1f} bytes/reading")
+
+
+if __name__ == "__main__":
+    _benchmark()
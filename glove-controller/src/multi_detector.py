@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Multi-glove motion detector: one rclpy node for every glove on the Pi.
+
+Each glove publishes under its own namespace and gets its events back there:
+    <device>/imu/all_data, <device>/imu/all_data_bin  ->  <device>/motion/detection
+
+Per-glove state lives in MultiMotionEngine arrays, and every tick evaluates
+all gloves in a single vectorized pass.
+
+    python3 multi_detector.py --ros-args -p devices:="['left', 'right']"
+"""
+import json
+import threading
+
+import rclpy
+from rclpy.node import Node
+from std_msgs.msg import String, UInt8MultiArray
+
+from imu_codec import decode_imu_payload
+from motion_engine import MultiMotionEngine
+
+
+class MultiMotionDetector(Node):
+    def __init__(self):
+        super().__init__('multi_motion_detector')
+
+        self.devices = list(self.declare_parameter('devices', ['glove1', 'glove2']).value)
+        tick_period = self.declare_parameter('tick_period', 0.02).value
+
+        self.engine = MultiMotionEngine(len(self.devices))
+        self.data_lock = threading.Lock()
+
+        # One subscription pair and one publisher per glove (每个手套一组订阅和发布)
+        self.subscriptions_imu = []
+        self.motion_pubs = []
+        for index, device in enumerate(self.devices):
+            callback = self._make_callback(index)
+            self.subscriptions_imu.append(
+                self.create_subscription(String, f'{device}/imu/all_data', callback, 10))
+            self.subscriptions_imu.append(
+                self.create_subscription(UInt8MultiArray, f'{device}/imu/all_data_bin', callback, 10))
+            self.motion_pubs.append(self.create_publisher(String, f'{device}/motion/detection', 10))
+
+        self.timer = self.create_timer(tick_period, self.tick_callback)
+        self.get_logger().info(f'Multi-glove motion detector initialized for {self.devices}')
+
+    def _make_callback(self, index):
+        def callback(msg):
+            try:
+                frame = decode_imu_payload(msg.data)
+                with self.data_lock:
+                    self.engine.push(index, frame.timestamps, frame.values[:, 2])
+            except Exception as e:
+                self.get_logger().error(f'[{self.devices[index]}] Processing data failed: {e}')
+        return callback
+
+    def tick_callback(self):
+        """Evaluate every glove's window in one pass and publish events (统一评估并发布事件)"""
+        with self.data_lock:
+            events = self.engine.tick()
+        for index, event in events:
+            msg = String()
+            msg.data = json.dumps({'motion': event.motion, 'timestamp': event.timestamp})
+            self.motion_pubs[index].publish(msg)
+            self.get_logger().info(f'[{self.devices[index]}] Detected motion: {event.motion}')
+
+
+def main(args=None):
+    rclpy.init(args=args)
+    node = MultiMotionDetector()
+    try:
+        rclpy.spin(node)
+    except KeyboardInterrupt:
+        print("User interrupted, shutting down...")
+    finally:
+        node.destroy_node()
+        rclpy.shutdown()
+
+
+if __name__ == '__main__':
+    main()
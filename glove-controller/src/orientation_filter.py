@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+Madgwick orientation filter for the glove IMU: one quaternion per sample.
+
+Accel and gyro are fused (IMU mode), plus the magnetometer when the frames
+carry it (MARG mode). Everything that does not depend on the previous
+orientation - time steps, unit conversion, normalisation - is done for the
+whole batch in NumPy; only the filter recurrence itself steps through the
+samples, on plain floats (批量预处理，逐样本递推).
+
+Message published on "imu/orientation", one per incoming imu/all_data message:
+    {"timestamp": [...], "quat": {"w": [...], "x": [...], "y": [...], "z": [...]}}
+(plain numbers instead of lists when the input was a single sample)
+
+ROS-free; the node lives in orientation_node.py. Run this file directly to
+benchmark samples/sec in both modes.
+"""
+import json
+import math
+
+import numpy as np
+
+
+class MadgwickFilter:
+    def __init__(self, beta=0.1, sample_rate=100.0, gyro_in_degrees=True):
+        self.beta = beta                    # Gradient-descent gain (梯度下降增益)
+        self.default_dt = 1.0 / sample_rate  # Used for the very first sample (首个样本使用的步长)
+        self.max_dt = 0.5                    # Larger gaps are treated as a restart (超过此间隔视为重新开始)
+        self.gyro_scale = math.pi / 180.0 if gyro_in_degrees else 1.0
+        self.q = (1.0, 0.0, 0.0, 0.0)        # w, x, y, z
+        self.last_timestamp = None
+
+    def update(self, timestamps, accel, gyro, mag=None):
+        """
+        Fuse N samples; `accel`, `gyro` (and `mag`) have shape (N, 3).
+        Returns the (N, 4) orientation after each sample (返回每个样本后的姿态).
+        """
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        n = len(timestamps)
+        if n == 0:
+            return np.zeros((0, 4))
+
+        # Batched preprocessing (批量预处理)
+        previous = timestamps[0] - self.default_dt if self.last_timestamp is None else self.last_timestamp
+        dt = np.diff(timestamps, prepend=previous)
+        dt = np.where((dt > 0) & (dt <= self.max_dt), dt, self.default_dt)
+        gyro = np.asarray(gyro, dtype=np.float64) * self.gyro_scale
+        accel = _normalize_rows(np.asarray(accel, dtype=np.float64))
+        use_mag = mag is not None
+        if use_mag:
+            mag = _normalize_rows(np.asarray(mag, dtype=np.float64))
+
+        out = np.empty((n, 4))
+        q = self.q
+        beta = self.beta
+        if use_mag:
+            for i, (d, g, a, m) in enumerate(zip(dt.tolist(), gyro.tolist(), accel.tolist(), mag.tolist())):
+                if m[0] == 0.0 and m[1] == 0.0 and m[2] == 0.0:
+                    q = _step_imu(q, g, a, d, beta)
+                else:
+                    q = _step_marg(q, g, a, m, d, beta)
+                out[i] = q
+        else:
+            for i, (d, g, a) in enumerate(zip(dt.tolist(), gyro.tolist(), accel.tolist())):
+                q = _step_imu(q, g, a, d, beta)
+                out[i] = q
+
+        self.q = q
+        self.last_timestamp = float(timestamps[-1])
+        return out
+
+
+def _normalize_rows(values):
+    """Unit-length rows; all-zero rows stay zero (零向量保持为零)"""
+    norms = np.linalg.norm(values, axis=1, keepdims=True)
+    return np.divide(values, norms, out=np.zeros_like(values), where=norms > 0)
+
+
+def _integrate(q, q_dot, dt):
+    q0, q1, q2, q3 = (q[k] + q_dot[k] * dt for k in range(4))
+    norm = math.sqrt(q0 * q0 + q1 * q1 + q2 * q2 + q3 * q3)
+    return (q0 / norm, q1 / norm, q2 / norm, q3 / norm)
+
+
+def _rate(q, g):
+    """Quaternion derivative from the gyroscope alone (陀螺仪积分得到的四元数变化率)"""
+    q0, q1, q2, q3 = q
+    gx, gy, gz = g
+    return [0.5 * (-q1 * gx - q2 * gy - q3 * gz),
+            0.5 * (q0 * gx + q2 * gz - q3 * gy),
+            0.5 * (q0 * gy - q1 * gz + q3 * gx),
+            0.5 * (q0 * gz + q1 * gy - q2 * gx)]
+
+
+def _apply_step(q_dot, s, beta):
+    norm = math.sqrt(s[0] * s[0] + s[1] * s[1] + s[2] * s[2] + s[3] * s[3])
+    if norm > 0.0:
+        for k in range(4):
+            q_dot[k] -= beta * s[k] / norm
+    return q_dot
+
+
+def _step_imu(q, g, a, dt, beta):
+    """One Madgwick update from gyro and accel (六轴更新)"""
+    q_dot = _rate(q, g)
+    ax, ay, az = a
+    if ax != 0.0 or ay != 0.0 or az != 0.0:
+        q0, q1, q2, q3 = q
+        f1 = 2.0 * (q1 * q3 - q0 * q2) - ax
+        f2 = 2.0 * (q0 * q1 + q2 * q3) - ay
+        f3 = 1.0 - 2.0 * (q1 * q1 + q2 * q2) - az
+        # Gradient J^T f of the gravity objective (重力目标函数的梯度)
+        s = [-2.0 * q2 * f1 + 2.0 * q1 * f2,
+             2.0 * q3 * f1 + 2.0 * q0 * f2 - 4.0 * q1 * f3,
+             -2.0 * q0 * f1 + 2.0 * q3 * f2 - 4.0 * q2 * f3,
+             2.0 * q1 * f1 + 2.0 * q2 * f2]
+        q_dot = _apply_step(q_dot, s, beta)
+    return _integrate(q, q_dot, dt)
+
+
+def _step_marg(q, g, a, m, dt, beta):
+    """One Madgwick update from gyro, accel and magnetometer (九轴更新)"""
+    q_dot = _rate(q, g)
+    ax, ay, az = a
+    if ax != 0.0 or ay != 0.0 or az != 0.0:
+        q0, q1, q2, q3 = q
+        mx, my, mz = m
+        # Earth-frame magnetic field, flattened onto the x-z plane (地磁参考方向)
+        hx = (mx * (q0 * q0 + q1 * q1 - q2 * q2 - q3 * q3)
+              + 2.0 * my * (q1 * q2 - q0 * q3) + 2.0 * mz * (q0 * q2 + q1 * q3))
+        hy = (2.0 * mx * (q0 * q3 + q1 * q2) + my * (q0 * q0 - q1 * q1 + q2 * q2 - q3 * q3)
+              + 2.0 * mz * (q2 * q3 - q0 * q1))
+        bx = math.sqrt(hx * hx + hy * hy)
+        bz = (2.0 * mx * (q1 * q3 - q0 * q2) + 2.0 * my * (q0 * q1 + q2 * q3)
+              + mz * (q0 * q0 - q1 * q1 - q2 * q2 + q3 * q3))
+
+        f1 = 2.0 * (q1 * q3 - q0 * q2) - ax
+        f2 = 2.0 * (q0 * q1 + q2 * q3) - ay
+        f3 = 1.0 - 2.0 * (q1 * q1 + q2 * q2) - az
+        f4 = bx * (1.0 - 2.0 * (q2 * q2 + q3 * q3)) + 2.0 * bz * (q1 * q3 - q0 * q2) - mx
+        f5 = 2.0 * bx * (q1 * q2 - q0 * q3) + 2.0 * bz * (q0 * q1 + q2 * q3) - my
+        f6 = 2.0 * bx * (q0 * q2 + q1 * q3) + bz * (1.0 - 2.0 * (q1 * q1 + q2 * q2)) - mz
+
+        # Gradient J^T f of the gravity + magnetic objective (重力与地磁目标函数的梯度)
+        s = [-2.0 * q2 * f1 + 2.0 * q1 * f2
+             - 2.0 * bz * q2 * f4 + 2.0 * (-bx * q3 + bz * q1) * f5 + 2.0 * bx * q2 * f6,
+             2.0 * q3 * f1 + 2.0 * q0 * f2 - 4.0 * q1 * f3
+             + 2.0 * bz * q3 * f4 + 2.0 * (bx * q2 + bz * q0) * f5 + 2.0 * (bx * q3 - 2.0 * bz * q1) * f6,
+             -2.0 * q0 * f1 + 2.0 * q3 * f2 - 4.0 * q2 * f3
+             + 2.0 * (-2.0 * bx * q2 - bz * q0) * f4 + 2.0 * (bx * q1 + bz * q3) * f5
+             + 2.0 * (bx * q0 - 2.0 * bz * q2) * f6,
+             2.0 * q1 * f1 + 2.0 * q2 * f2
+             + 2.0 * (-2.0 * bx * q3 + bz * q1) * f4 + 2.0 * (-bx * q0 + bz * q2) * f5 + 2.0 * bx * q1 * f6]
+        q_dot = _apply_step(q_dot, s, beta)
+    return _integrate(q, q_dot, dt)
+
+
+def orientation_message(timestamps, quats):
+    """JSON payload for imu/orientation, columnar like a batched imu/all_data (构造发布消息)"""
+    if len(timestamps) == 1:
+        w, x, y, z = quats[0].tolist()
+        return json.dumps({'timestamp': float(timestamps[0]), 'quat': {'w': w, 'x': x, 'y': y, 'z': z}})
+    return json.dumps({
+        'timestamp': np.asarray(timestamps).tolist(),
+        'quat': dict(zip('wxyz', quats.T.tolist())),
+    })
+
+
+def _benchmark(n_samples=20000, batch=20):
+    import time
+
+    rng = np.random.default_rng(0)
+    timestamps = np.arange(n_samples) * 0.001
+    accel = rng.normal(0, 0.05, (n_samples, 3)) + (0.0, 0.0, 1.0)
+    gyro = rng.normal(0, 5.0, (n_samples, 3))
+    mag = rng.normal(0, 0.05, (n_samples, 3)) + (0.4, 0.0, -0.9)
+    for label, use_mag in (('imu', False), ('marg', True)):
+        f = MadgwickFilter()
+        start = time.perf_counter()
+        for i in range(0, n_samples, batch):
+            f.update(timestamps[i:i + batch], accel[i:i + batch], gyro[i:i + batch],
+                     mag[i:i + batch] if use_mag else None)
+        elapsed = time.perf_counter() - start
+        print(f'{label:>4}: {n_samples / elapsed:9.0f} samples/s  {elapsed / n_samples * 1e6:6.2f} us/sample')
+
+
+if __name__ == '__main__':
+    _benchmark()
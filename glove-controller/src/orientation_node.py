@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Orientation node: fuses the glove IMU stream into quaternions at sensor rate.
+
+    imu/all_data, imu/all_data_bin  ->  imu/orientation
+
+Needs accel + gyro in the frames; the magnetometer is used when present.
+
+    python3 orientation_node.py --ros-args -p beta:=0.05
+"""
+import threading
+
+import rclpy
+from rclpy.node import Node
+from std_msgs.msg import String, UInt8MultiArray
+
+from imu_codec import decode_imu_payload
+from orientation_filter import MadgwickFilter, orientation_message
+
+
+class OrientationNode(Node):
+    def __init__(self):
+        super().__init__('orientation_filter')
+
+        self.filter = MadgwickFilter(
+            beta=self.declare_parameter('beta', 0.1).value,
+            sample_rate=self.declare_parameter('sample_rate', 100.0).value,
+            gyro_in_degrees=self.declare_parameter('gyro_in_degrees', True).value,
+        )
+        self.data_lock = threading.Lock()
+
+        self.subscription = self.create_subscription(String, 'imu/all_data', self.data_callback, 10)
+        self.subscription_bin = self.create_subscription(
+            UInt8MultiArray, 'imu/all_data_bin', self.data_callback, 10)
+        self.orientation_pub = self.create_publisher(String, 'imu/orientation', 10)
+        self.get_logger().info('Orientation filter initialized')
+
+    def data_callback(self, msg):
+        try:
+            frame = decode_imu_payload(msg.data)
+            values = frame.values
+            if values.shape[1] < 6:
+                return  # Accel only, nothing to fuse (仅有加速度，无法融合)
+            mag = values[:, 6:9] if values.shape[1] >= 9 else None
+            with self.data_lock:
+                quats = self.filter.update(frame.timestamps, values[:, 0:3], values[:, 3:6], mag)
+            out = String()
+            out.data = orientation_message(frame.timestamps, quats)
+            self.orientation_pub.publish(out)
+        except Exception as e:
+            self.get_logger().error(f'Processing data failed: {e}')
+
+
+def main(args=None):
+    rclpy.init(args=args)
+    node = OrientationNode()
+    try:
+        rclpy.spin(node)
+    except KeyboardInterrupt:
+        print("User interrupted, shutting down...")
+    finally:
+        node.destroy_node()
+        rclpy.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+Store-and-forward outbox for MQTT publishes.
+
+While the broker is unreachable, readings are appended to a local SQLite
+database in WAL mode instead of being lost. Once the broker is back,
+`drain()` sends them oldest first in bounded batches at no more than
+`max_rate` messages per second, so a long outage does not flood the broker
+on reconnect.
+
+A message only counts as delivered once the broker acknowledges it: `send`
+publishes at QoS 1 and returns the message id, and the client's on_publish
+callback passes that id to `acknowledge()`. A stored row is deleted only
+then. A direct publish that is never acknowledged - the connection drops,
+or `ack_timeout` passes, e.g. while the broker is silently gone and the
+keepalive has not noticed yet - is written to the database and sent again.
+Delivery is at least once: a message whose acknowledgement was lost may
+arrive twice.
+
+Memory stays bounded (at most one batch is loaded at a time) and so does the
+disk: beyond `max_messages` or `max_bytes` of payload the oldest readings
+are dropped and counted. `metrics()` reports queue depth, messages awaiting
+acknowledgement, drops, the age of the oldest stored message and drain
+progress; `drain()` also prints them every `report_period` seconds while
+messages are stored, so an outage can be followed as it happens.
+
+Messages are only stored when the broker does not take or confirm them, or
+when older messages are still waiting (so the order is kept); in normal
+operation a publish never touches the disk.
+"""
+import sqlite3
+import threading
+import time
+from collections import deque
+
+
+class Outbox:
+    def __init__(self, path, send, max_messages=10000, max_bytes=4 * 1024 * 1024,
+                 batch_size=50, max_rate=100.0, ack_timeout=120.0, report_period=30.0):
+        self.send = send                  # send(topic, payload) -> message id, or None if not sent
+        self.max_messages = max_messages
+        self.max_bytes = max_bytes        # Cap on stored payload bytes
+        self.batch_size = batch_size      # Messages loaded and sent per drain() call
+        self.max_rate = max_rate          # Drain rate limit, messages per second
+        self.ack_timeout = ack_timeout    # Seconds before an unacknowledged message is sent again
+        self.report_period = report_period  # Seconds between metrics printed while messages are stored
+        self.lock = threading.Lock()
+
+        # Message id -> (row id or None, payload bytes, topic, payload, sent at).
+        # Direct publishes have no row and keep topic and payload until acknowledged.
+        self.inflight = {}
+        self.cursor = 0            # Highest row id sent and not yet given up on
+        # Filled from the MQTT network thread and applied by the owner of the
+        # outbox, so that thread never waits on this lock or on disk
+        self.acks = deque()
+        self.disconnected = threading.Event()
+
+        self.db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(f"PRAGMA journal_size_limit={max_bytes}")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS outbox ("
+            "id INTEGER PRIMARY KEY AUTOINCREMENT, topic TEXT NOT NULL, "
+            "payload BLOB NOT NULL, queued_at REAL NOT NULL)"
+        )
+        # Messages left over from a previous run are drained like any other
+        self.depth, self.bytes = self.db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(payload)), 0) FROM outbox").fetchone()
+
+        self.tokens = float(batch_size)
+        self.last_refill = time.monotonic()
+        self.enqueued = 0
+        self.dropped = 0
+        self.drained = 0
+        self.drain_started = None  # Start of the current drain, monotonic
+        self.drain_rate = 0.0      # Messages per second of the last finished drain
+        self.last_report = time.monotonic()
+
+    @property
+    def drain_interval(self):
+        """Seconds until a full batch may be sent again"""
+        return self.batch_size / self.max_rate
+
+    def publish(self, topic, payload):
+        """Send now if possible, otherwise store; returns True if it was sent"""
+        with self.lock:
+            self._settle()
+            if self.depth == 0:
+                mid = self.send(topic, payload)
+                if mid is not None:
+                    self.inflight[mid] = (None, 0, topic, payload, time.monotonic())
+                    return True
+            self._append(topic, payload)
+            return False
+
+    def acknowledge(self, mid):
+        """The broker confirmed message `mid`; safe to call from the MQTT network thread"""
+        self.acks.append(mid)
+
+    def connection_lost(self):
+        """Nothing in flight will be confirmed any more; safe to call from any thread"""
+        self.disconnected.set()
+
+    def _settle(self):
+        """Delete acknowledged rows and take back messages that were never confirmed"""
+        rows = []
+        while self.acks:
+            entry = self.inflight.pop(self.acks.popleft(), None)
+            if entry is not None and entry[0] is not None:
+                rows.append(entry)
+        if rows:
+            self.db.executemany("DELETE FROM outbox WHERE id = ?", [(row_id,) for row_id, *_ in rows])
+            self.depth -= len(rows)
+            self.bytes -= sum(size for _, size, *_ in rows)
+            self.drained += len(rows)
+
+        lost = self.disconnected.is_set()
+        self.disconnected.clear()
+        now = time.monotonic()
+        expired = [mid for mid, entry in self.inflight.items()
+                   if lost or now - entry[4] > self.ack_timeout]
+        if expired:
+            for mid in expired:
+                row_id, _, topic, payload, _ = self.inflight.pop(mid)
+                if row_id is None:
+                    self._append(topic, payload)
+            # Send every stored row again from the oldest; acknowledgements
+            # still on their way for the old message ids are ignored
+            for mid in [mid for mid, entry in self.inflight.items() if entry[0] is not None]:
+                del self.inflight[mid]
+            self.cursor = 0
+
+        if self.depth == 0 and self.drain_started is not None:
+            self._finish_drain()
+
+    def _append(self, topic, payload):
+        data = payload.encode()
+        if len(data) > self.max_bytes:
+            self.dropped += 1
+            return
+        self.db.execute("INSERT INTO outbox (topic, payload, queued_at) VALUES (?, ?, ?)",
+                        (topic, data, time.time()))
+        self.depth += 1
+        self.bytes += len(data)
+        self.enqueued += 1
+        if self.depth > self.max_messages or self.bytes > self.max_bytes:
+            self._evict()
+
+    def _evict(self):
+        # Drop the oldest messages until both caps hold again
+        while self.depth > self.max_messages or self.bytes > self.max_bytes:
+            rows = self.db.execute("SELECT id, LENGTH(payload) FROM outbox ORDER BY id LIMIT ?",
+                                   (max(self.depth - self.max_messages, 0) + self.batch_size,)).fetchall()
+            last_id = None
+            for row_id, size in rows:
+                if self.depth <= self.max_messages and self.bytes <= self.max_bytes:
+                    break
+                last_id = row_id
+                self.depth -= 1
+                self.bytes -= size
+                self.dropped += 1
+            if last_id is None:
+                break
+            self.db.execute("DELETE FROM outbox WHERE id <= ?", (last_id,))
+            # An evicted row may still be waiting for its acknowledgement
+            for mid in [mid for mid, entry in self.inflight.items()
+                        if entry[0] is not None and entry[0] <= last_id]:
+                del self.inflight[mid]
+
+    def drain(self):
+        """Send one rate-limited batch of stored messages; returns how many were sent"""
+        with self.lock:
+            self._settle()
+            if self.depth == 0:
+                return 0
+            now = time.monotonic()
+            # Report during an outage too, not only once the drain is over
+            if now - self.last_report >= self.report_period:
+                self.last_report = now
+                print("Outbox:", self._metrics())
+            self.tokens = min(float(self.batch_size), self.tokens + (now - self.last_refill) * self.max_rate)
+            self.last_refill = now
+            limit = int(self.tokens)
+            if limit == 0:
+                return 0
+
+            sent = 0
+            for row_id, topic, payload in self.db.execute(
+                    "SELECT id, topic, payload FROM outbox WHERE id > ? ORDER BY id LIMIT ?",
+                    (self.cursor, limit)).fetchall():
+                mid = self.send(topic, payload.decode())
+                if mid is None:
+                    break  # Broker gone again; retry on the next call
+                # The row stays until the broker acknowledges it
+                self.inflight[mid] = (row_id, len(payload), None, None, now)
+                self.cursor = row_id
+                sent += 1
+            self.tokens -= sent
+            if sent and self.drain_started is None:
+                self.drain_started = now
+            return sent
+
+    def _finish_drain(self):
+        elapsed = time.monotonic() - self.drain_started
+        self.drain_rate = self.drained / elapsed if elapsed > 0 else float(self.drained)
+        print(f"Outbox drained {self.drained} messages in {elapsed:.1f} s ({self.drain_rate:.0f} msg/s)")
+        self.drain_started = None
+        self.drained = 0
+        # Give the WAL file's disk space back once everything is out
+        self.db.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    def metrics(self):
+        with self.lock:
+            return self._metrics()
+
+    def _metrics(self):
+        oldest = self.db.execute("SELECT queued_at FROM outbox ORDER BY id LIMIT 1").fetchone()
+        return {
+            "depth": self.depth,
+            "bytes": self.bytes,
+            "inflight": len(self.inflight),
+            "enqueued": self.enqueued,
+            "dropped": self.dropped,
+            "oldest_age": round(time.time() - oldest[0], 1) if oldest else 0.0,
+            "draining": self.drain_started is not None,
+            "drain_time": round(time.monotonic() - self.drain_started, 1) if self.drain_started is not None else 0.0,
+            "drain_rate": round(self.drain_rate, 1),
+        }
+
+    def close(self):
+        """Store whatever was sent but never acknowledged, then close the database"""
+        with self.lock:
+            self._settle()
+            for row_id, _, topic, payload, _ in self.inflight.values():
+                if row_id is None:
+                    self._append(topic, payload)
+            self.inflight.clear()
+            self.db.close()
+
+
+def paho_outbox(path, client, **kwargs):
+    """
+    Outbox that publishes through a paho client at QoS 1; takes over the
+    client's on_publish and on_disconnect callbacks
+    """
+    def send(topic, payload):
+        if not client.is_connected():
+            return None
+        info = client.publish(topic, payload, qos=1)
+        return info.mid if info.rc == 0 else None  # 0 is MQTT_ERR_SUCCESS
+
+    outbox = Outbox(path, send, **kwargs)
+    client.on_publish = lambda client, userdata, mid: outbox.acknowledge(mid)
+    client.on_disconnect = lambda client, userdata, rc: outbox.connection_lost()
+    return outbox
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Offline replay and benchmark for the glove motion detector, no ROS needed.
+
+Feeds a recorded imu/all_data log through MotionEngine and reports
+throughput, per-event detection latency and event counts.
+
+Supported logs:
+    *.jsonl / *.txt : one imu/all_data payload (JSON, single or batched) per line
+    *.yaml / *.echo : output of `ros2 topic echo imu/all_data > log.echo`
+    *.bin           : concatenated binary frames (see imu_codec.py)
+
+Examples:
+    python3 replay.py log.jsonl                 # real time
+    python3 replay.py log.jsonl --speed 10      # 10x faster than recorded
+    python3 replay.py log.jsonl --speed 0       # as fast as possible
+    python3 replay.py log.jsonl --speed 0 --expect expected.json
+"""
+import argparse
+import json
+import sys
+import time
+from collections import Counter
+
+import numpy as np
+
+from imu_codec import HEADER, IMU_MAGIC, decode_imu_payload
+from motion_engine import MotionEngine
+
+
+def load_messages(path):
+    """Read a log into a list of raw imu/all_data payloads"""
+    if path.endswith('.bin'):
+        with open(path, 'rb') as f:
+            blob = f.read()
+        messages = []
+        offset = 0
+        while offset < len(blob):
+            magic, _, n_channels, n_samples, _, _ = HEADER.unpack_from(blob, offset)
+            if magic != IMU_MAGIC:
+                raise ValueError(f'Corrupt frame at byte {offset}')
+            size = HEADER.size + 4 * n_samples * (1 + n_channels)
+            messages.append(blob[offset:offset + size])
+            offset += size
+        return messages
+
+    with open(path, 'r') as f:
+        text = f.read()
+
+    if path.endswith(('.yaml', '.echo')):
+        import yaml  # ships with ROS 2
+        return [doc['data'] for doc in yaml.safe_load_all(text) if doc and 'data' in doc]
+
+    return [line for line in (raw.strip() for raw in text.splitlines()) if line]
+
+
+def replay(messages, speed=1.0, engine=None):
+    """
+    Push `messages` through `engine`, paced at `speed` times the recorded
+    rate (0 = unthrottled). Returns a dict of counters and latencies.
+    """
+    engine = engine or MotionEngine()
+    # Each message is due when its newest sample was taken (按最新样本时间安排投递)
+    due = [float(decode_imu_payload(m).timestamps[-1]) for m in messages]
+    t_first = due[0] if due else 0.0
+
+    samples = 0
+    events = []
+    processing = []
+    detection = []
+    start_wall = time.perf_counter()
+    busy = 0.0
+
+    for message, due_time in zip(messages, due):
+        if speed > 0:
+            delay = start_wall + (due_time - t_first) / speed - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+
+        arrived = time.perf_counter()
+        frame = decode_imu_payload(message)
+        new_events = engine.ingest(frame.timestamps, frame.values[:, :3])
+        done = time.perf_counter()
+
+        busy += done - arrived
+        samples += len(frame.timestamps)
+        for event in new_events:
+            events.append(event)
+            processing.append(done - arrived)
+            if speed > 0:
+                # How long after the triggering sample was taken the event came
+                # out, measured on the IMU clock (以IMU时钟计的检测延迟)
+                detection.append((done - start_wall) * speed + t_first - event.timestamp)
+
+    return {
+        'messages': len(messages),
+        'samples': samples,
+        'wall_time': time.perf_counter() - start_wall,
+        'busy_time': busy,
+        'events': events,
+        'processing_latency': processing,
+        'detection_latency': detection,
+    }
+
+
+def _latency_line(name, values):
+    if not values:
+        return f'{name}: n/a'
+    ms = np.asarray(values) * 1e3
+    return (f'{name}: mean {ms.mean():.3f} ms, p50 {np.percentile(ms, 50):.3f} ms, '
+            f'p95 {np.percentile(ms, 95):.3f} ms, max {ms.max():.3f} ms')
+
+
+def report(result, show_events=False):
+    counts = Counter(event.motion for event in result['events'])
+    print(f"messages : {result['messages']}")
+    print(f"samples  : {result['samples']}")
+    print(f"wall time: {result['wall_time']:.3f} s")
+    if result['busy_time'] > 0:
+        print(f"throughput: {result['samples'] / result['busy_time']:.0f} samples/s (detector busy time)")
+    print(_latency_line('processing latency', result['processing_latency']))
+    print(_latency_line('detection latency (IMU clock)', result['detection_latency']))
+    print('events   : ' + (', '.join(f'{k}={v}' for k, v in sorted(counts.items())) or 'none'))
+    if show_events:
+        for event in result['events']:
+            print(f'  {event.timestamp:.3f}  {event.motion}')
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Replay an imu/all_data log through MotionEngine')
+    parser.add_argument('log', help='recorded imu/all_data log')
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help='replay speed relative to the recording, 0 = as fast as possible')
+    parser.add_argument('--repeat', type=int, default=1, help='replay the log this many times')
+    parser.add_argument('--events', action='store_true', help='print every detected event')
+    parser.add_argument('--expect', help='JSON file of expected event counts, e.g. {"LIFT_START": 3}')
+    args = parser.parse_args(argv)
+
+    messages = load_messages(args.log)
+    if not messages:
+        print('Log contains no messages')
+        return 1
+
+    counts = Counter()
+    for run in range(args.repeat):
+        if args.repeat > 1:
+            print(f'--- run {run + 1}/{args.repeat}')
+        counts = report(replay(messages, args.speed), args.events)
+
+    if args.expect:
+        with open(args.expect, 'r') as f:
+            expected = json.load(f)
+        if dict(counts) != expected:
+            print(f'Event counts differ from {args.expect}: expected {expected}, got {dict(counts)}')
+            return 1
+        print(f'Event counts match {args.expect}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
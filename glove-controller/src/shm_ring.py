@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Single-writer shared-memory ring for handing IMU samples and detector state
+to another process without locks (无锁共享内存环形缓冲区).
+
+Layout of the segment:
+    int64[8] header : seq, count, capacity, n_cols, state, motion_status, writer_pid, 0
+    float64[capacity][n_cols] rows : [timestamp, accel_x, accel_y, accel_z, ...]
+
+Seqlock protocol: the writer bumps `seq` to an odd value, writes rows and
+state, then bumps it to the next even value. A reader copies what it needs
+and retries if `seq` was odd or changed in the meantime. The writer never
+waits for readers, so a slow or stalled viewer cannot hold up detection.
+"""
+import os
+import struct
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+STATES = ('STATIONARY', 'UP', 'DOWN')
+MOTION_STATUSES = ('Stationary', 'Lifting', 'Dropping')
+
+_SEQ, _COUNT, _CAPACITY, _N_COLS, _STATE, _MOTION_STATUS, _WRITER_PID = range(7)
+_HEADER_WORDS = 8
+
+
+def _pid_alive(pid):
+    if pid <= 0:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class SharedImuRing:
+    def __init__(self, shm, owner):
+        self.shm = shm
+        self.owner = owner
+        self.header = np.ndarray((_HEADER_WORDS,), dtype=np.int64, buffer=shm.buf)
+        self.capacity = int(self.header[_CAPACITY])
+        self.n_cols = int(self.header[_N_COLS])
+        self.rows = np.ndarray((self.capacity, self.n_cols), dtype=np.float64,
+                               buffer=shm.buf, offset=_HEADER_WORDS * 8)
+
+    @classmethod
+    def create(cls, name, capacity=8192, n_cols=4):
+        """Create the segment; the creating process is the only writer (创建共享内存段)"""
+        size = _HEADER_WORDS * 8 + capacity * n_cols * 8
+        try:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            existing = shared_memory.SharedMemory(name=name)
+            writer_pid = 0
+            if existing.size >= _HEADER_WORDS * 8:
+                writer_pid = struct.unpack_from('q', existing.buf, _WRITER_PID * 8)[0]
+            existing.close()
+            if _pid_alive(writer_pid):
+                # Still written by a running detector; leave it to that one
+                # (仍被运行中的检测器使用，不能删除)
+                resource_tracker.unregister(existing._name, 'shared_memory')
+                raise FileExistsError(
+                    f"shared memory '{name}' is in use by process {writer_pid}; "
+                    f"pass a different --shm-name") from None
+            # Left behind by a crashed detector (上次异常退出遗留的共享内存)
+            existing.unlink()
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        header = np.ndarray((_HEADER_WORDS,), dtype=np.int64, buffer=shm.buf)
+        header[:] = 0
+        header[_CAPACITY] = capacity
+        header[_N_COLS] = n_cols
+        header[_WRITER_PID] = os.getpid()
+        return cls(shm, owner=True)
+
+    @classmethod
+    def attach(cls, name):
+        """Attach to an existing segment as a reader (以读者身份连接)"""
+        try:
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            # Python < 3.13: keep our resource tracker from unlinking the
+            # writer's segment when the reader exits
+            shm = shared_memory.SharedMemory(name=name)
+            resource_tracker.unregister(shm._name, 'shared_memory')
+        return cls(shm, owner=False)
+
+    def write(self, rows, state, motion_status):
+        """Append `rows` and publish the detector state (写入新样本和检测状态)"""
+        header = self.header
+        rows = rows[-self.capacity:]
+        count = int(header[_COUNT])
+
+        header[_SEQ] += 1  # odd: write in progress (奇数：正在写入)
+        index = np.arange(count, count + len(rows)) % self.capacity
+        self.rows[index] = rows
+        header[_COUNT] = count + len(rows)
+        header[_STATE] = STATES.index(state) if state in STATES else 0
+        header[_MOTION_STATUS] = MOTION_STATUSES.index(motion_status) if motion_status in MOTION_STATUSES else 0
+        header[_SEQ] += 1  # even: consistent again (偶数：数据一致)
+
+    def read_since(self, cursor, retries=100):
+        """
+        Rows written after `cursor` plus the state, as
+        `(rows, cursor, motion_status, state)`; same shape as the detector's
+        plot source. Returns no rows if the writer kept interfering.
+        """
+        header = self.header
+        for _ in range(retries):
+            seq = int(header[_SEQ])
+            if seq & 1:
+                continue
+            count = int(header[_COUNT])
+            state = STATES[int(header[_STATE])]
+            motion_status = MOTION_STATUSES[int(header[_MOTION_STATUS])]
+            # Leave a margin so rows about to be overwritten are not read
+            # (预留余量，避免读取即将被覆盖的数据)
+            first = max(cursor, count - self.capacity // 2)
+            index = np.arange(first, count) % self.capacity
+            rows = self.rows[index]
+            if int(header[_SEQ]) == seq:
+                return rows, count, motion_status, state
+        return self.rows[:0].copy(), cursor, MOTION_STATUSES[0], STATES[0]
+
+    def close(self):
+        # Drop numpy views before closing the mapping (关闭前释放numpy视图)
+        self.header = None
+        self.rows = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
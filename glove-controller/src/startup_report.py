@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Startup cost of the glove entry points with and without their UI
+(启动耗时与内存报告).
+
+Every case imports what that mode of the entry point imports, in a fresh
+interpreter, and reports the import time, the peak RSS, whether matplotlib
+or tkinter got loaded, and the heaviest top-level imports (from -X importtime).
+
+    python3 startup_report.py
+"""
+import json
+import os
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# (label, modules imported by that mode)
+CASES = (
+    ('interpreter only', ()),
+    ('mpu_detector --headless', ('mpu_detector',)),
+    ('mpu_detector (live plot)', ('mpu_detector', 'live_plot')),
+    ('gui --headless', ('gui',)),
+    ('gui (window)', ('gui', 'tkinter')),
+    ('glove_stack --headless', ('glove_stack', 'force_detector', 'mpu_detector', 'gui')),
+)
+
+MARKER = '-- probe start --'
+PROBE = '''
+import importlib, json, resource, sys, time
+sys.stderr.write('-- probe start --\\n')
+start = time.perf_counter()
+for name in sys.argv[1:]:
+    importlib.import_module(name)
+elapsed = time.perf_counter() - start
+print(json.dumps({
+    'seconds': elapsed,
+    'rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    'matplotlib': 'matplotlib' in sys.modules,
+    'tkinter': 'tkinter' in sys.modules,
+}))
+'''
+
+
+def heaviest_imports(stderr, count=3):
+    """Top-level packages with the largest cumulative import time (累计导入耗时最多的包)"""
+    totals = {}
+    lines = stderr.splitlines()
+    # Skip what the probe itself imported (跳过探针自身的导入)
+    lines = lines[lines.index(MARKER) + 1:] if MARKER in lines else lines
+    for line in lines:
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        if not name.startswith('  '):  # Nested imports are indented further
+            name = name.strip()
+            totals[name] = totals.get(name, 0) + int(cumulative)
+    ranked = sorted(totals.items(), key=lambda item: item[1], reverse=True)[:count]
+    return ', '.join(f'{name} {micros / 1e3:.0f} ms' for name, micros in ranked)
+
+
+def run_case(modules):
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', PROBE, *modules],
+                            cwd=HERE, capture_output=True, text=True)
+    if result.returncode != 0:
+        missing = result.stderr.strip().splitlines()[-1] if result.stderr.strip() else 'failed'
+        return None, missing
+    return json.loads(result.stdout.strip().splitlines()[-1]), heaviest_imports(result.stderr)
+
+
+def main():
+    print(f'{"mode":<28} {"import":>9} {"peak RSS":>10}  {"mpl":>3} {"tk":>3}  heaviest imports')
+    for label, modules in CASES:
+        stats, detail = run_case(modules)
+        if stats is None:
+            print(f'{label:<28} {"-":>9} {"-":>10}  {"-":>3} {"-":>3}  unavailable: {detail}')
+            continue
+        print(f'{label:<28} {stats["seconds"] * 1e3:7.0f} ms {stats["rss_kb"] / 1024:7.1f} MB  '
+              f'{"yes" if stats["matplotlib"] else "no":>3} {"yes" if stats["tkinter"] else "no":>3}  {detail}')
+
+
+if __name__ == '__main__':
+    main()
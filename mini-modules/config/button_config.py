@@ -7,5 +7,7 @@ config = {
     "device_id": device_id,
     "mqtt_mdns_name": mqtt_mdns_name,
     "subscriptions": [mqtt_button_config_topic, mqtt_button_data_topic],
-    "data_topic": mqtt_button_data_topic
+    "data_topic": mqtt_button_data_topic,
+    "queue_policy": "drop_newest",
+    "queue_size": 8
 }
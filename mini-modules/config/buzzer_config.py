@@ -2,10 +2,15 @@ device_id = "NVwiLtkYt8EDjWESoBohM3"
 mqtt_mdns_name = "platform.local"
 mqtt_buzzor_data_topic = f"sensors/{device_id}/data"
 mqtt_buzzor_config_topic = f"devices/{device_id}/config"
+mqtt_buzzor_status_topic = f"devices/{device_id}/status"  # Replies only; not subscribed
 
 config = {
     "device_id": device_id,
     "mqtt_mdns_name": mqtt_mdns_name,
     "subscriptions": [mqtt_buzzor_config_topic, mqtt_buzzor_data_topic],
-    "data_topic": mqtt_buzzor_data_topic
+    "data_topic": mqtt_buzzor_data_topic,
+    "config_topic": mqtt_buzzor_config_topic,
+    "status_topic": mqtt_buzzor_status_topic,
+    "queue_policy": "drop_oldest",
+    "queue_size": 32
 }
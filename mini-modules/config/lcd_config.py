@@ -7,5 +7,7 @@ config = {
     "device_id": device_id,
     "mqtt_mdns_name": mqtt_mdns_name,
     "subscriptions": [mqtt_lcd_config_topic, mqtt_lcd_data_topic],
-    "data_topic": mqtt_lcd_data_topic
+    "data_topic": mqtt_lcd_data_topic,
+    "queue_policy": "coalesce_latest",
+    "queue_size": 8
 }
\ No newline at end of file
@@ -0,0 +1,7 @@
+import socket
+
+# One MQTT connection serves every device module on this node
+config = {
+    "client_id": f"{socket.gethostname()}_mini_modules",
+    "mqtt_mdns_name": "platform.local",
+}
@@ -0,0 +1,102 @@
+import threading
+import time
+from collections import deque
+
+POLICIES = ("drop_oldest", "drop_newest", "coalesce_latest")
+
+class HandlerExecutor:
+    """
+    Runs one device's message handler on its own worker thread, so a slow
+    handler (I2C, PWM) never holds up paho's network thread or other devices.
+
+    The queue is bounded; when it is full a new message is handled by policy:
+      drop_oldest      discard the oldest waiting message
+      drop_newest      discard the new message
+      coalesce_latest  replace the waiting message on the same topic with the
+                       new one (only the latest state matters), else drop oldest
+    """
+
+    def __init__(self, name, handler, max_queue=32, policy="drop_oldest"):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown queue policy: {policy}")
+        self.name = name
+        self.handler = handler  # handler(topic, payload)
+        self.max_queue = max_queue
+        self.policy = policy
+        self.pending = deque()  # (topic, payload, enqueued_at)
+        self.condition = threading.Condition()
+        self.thread = None
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.queued = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.handled = 0
+        self.errors = 0
+        self.wait_total = 0.0     # Seconds messages spent queued
+        self.latency_total = 0.0  # Seconds spent in the handler
+        self.latency_max = 0.0
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, name=f"{self.name}-handler", daemon=True)
+            self.thread.start()
+
+    def submit(self, topic, payload):
+        """Queue a message for the handler; returns False if it was dropped"""
+        with self.condition:
+            if self.policy == "coalesce_latest":
+                for i, (pending_topic, _, enqueued_at) in enumerate(self.pending):
+                    if pending_topic == topic:
+                        # Keep the queue position, so a steady stream is not starved
+                        self.pending[i] = (topic, payload, enqueued_at)
+                        self.coalesced += 1
+                        return True
+            if len(self.pending) >= self.max_queue:
+                self.dropped += 1
+                if self.policy == "drop_newest":
+                    return False
+                self.pending.popleft()
+            self.pending.append((topic, payload, time.monotonic()))
+            self.queued += 1
+            self.condition.notify()
+            return True
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while not self.pending:
+                    self.condition.wait()
+                topic, payload, enqueued_at = self.pending.popleft()
+            start = time.monotonic()
+            try:
+                self.handler(topic, payload)
+            except Exception as e:
+                print(f"[{self.name}] Error in handler:", e)
+                with self.condition:
+                    self.errors += 1
+            latency = time.monotonic() - start
+            with self.condition:
+                self.handled += 1
+                self.wait_total += start - enqueued_at
+                self.latency_total += latency
+                self.latency_max = max(self.latency_max, latency)
+
+    def stats(self, reset=False):
+        with self.condition:
+            handled = max(self.handled, 1)
+            stats = {
+                "depth": len(self.pending),
+                "queued": self.queued,
+                "dropped": self.dropped,
+                "coalesced": self.coalesced,
+                "handled": self.handled,
+                "errors": self.errors,
+                "wait_ms_avg": round(self.wait_total / handled * 1e3, 3),
+                "latency_ms_avg": round(self.latency_total / handled * 1e3, 3),
+                "latency_ms_max": round(self.latency_max * 1e3, 3),
+            }
+            if reset:
+                self.reset_stats()
+            return stats
@@ -1,38 +1,107 @@
 import json
+import threading
 import paho.mqtt.client as mqtt
 from core.broker import resolve_broker
+from core.topic_router import TopicRouter
+from core.handler_executor import HandlerExecutor
 
-class MQTTDeviceClient:
-    def __init__(self, config, message_handler):
-        self.config = config
-        self.message_handler = message_handler
-        self.client = mqtt.Client(client_id=f"{config['device_id']}_client")
+class MQTTConnection:
+    """
+    One paho client (socket, network thread and broker session) shared by
+    every device on the node. Subscriptions from all devices go into a
+    TopicRouter, which dispatches each inbound message to the devices whose
+    filters match it.
+    """
+
+    def __init__(self, client_id, mqtt_mdns_name):
+        self.mqtt_mdns_name = mqtt_mdns_name
+        self.router = TopicRouter()
+        self.lock = threading.Lock()
+        self.started = False
+        self.client = mqtt.Client(client_id=client_id)
         self.client.on_connect = self.on_connect
         self.client.on_message = self.on_message
 
+    def subscribe(self, topic_filter, handler):
+        """handler(topic, payload) is called for every message matching topic_filter"""
+        with self.lock:
+            is_new = self.router.add(topic_filter, handler)
+        if is_new and self.client.is_connected():
+            self.client.subscribe(topic_filter)
+
     def on_connect(self, client, userdata, flags, rc):
         if rc == 0:
-            client.subscribe(self.config["data_topic"])
-            print(f"[{self.config['device_id']}] Connected to broker")
-            for topic in self.config["subscriptions"]:
+            print("Connected to broker")
+            # Also restores the subscriptions after a reconnect
+            with self.lock:
+                topic_filters = sorted(self.router.topic_filters)
+            for topic in topic_filters:
                 client.subscribe(topic)
                 print(f"Subscribed to {topic}")
         else:
             print("MQTT connect failed:", rc)
 
     def on_message(self, client, userdata, msg):
+        with self.lock:
+            handlers = self.router.match(msg.topic)
+        if not handlers:
+            return
         try:
             payload = json.loads(msg.payload.decode())
-            self.message_handler(msg.topic, payload, self)
         except Exception as e:
             print("Error in on_message:", e)
+            return
+        for handler in handlers:
+            handler(msg.topic, payload)
 
     def publish(self, topic, payload):
-        result = self.client.publish(topic, json.dumps(payload))
-        if result.rc != mqtt.MQTT_ERR_SUCCESS:
-            print("Failed to publish:", result.rc)
+        return self.client.publish(topic, json.dumps(payload))
 
     def start(self):
-        broker_ip = resolve_broker(self.config["mqtt_mdns_name"])
+        """Connect once; later calls (one per device) do nothing"""
+        with self.lock:
+            if self.started:
+                return
+            self.started = True
+        broker_ip = resolve_broker(self.mqtt_mdns_name)
         self.client.connect(broker_ip, 1883, 60)
         self.client.loop_start()
+
+class MQTTDeviceClient:
+    def __init__(self, config, message_handler, connection=None):
+        self.config = config
+        self.message_handler = message_handler
+        # The handler runs on the device's own worker, never on paho's network thread
+        self.executor = HandlerExecutor(
+            config["device_id"],
+            self.handle,
+            max_queue=config.get("queue_size", 32),
+            policy=config.get("queue_policy", "drop_oldest"),
+        )
+        self.executor.start()
+        # Without a shared connection the device gets one of its own
+        if connection is None:
+            connection = MQTTConnection(f"{config['device_id']}_client", config["mqtt_mdns_name"])
+        self.connection = connection
+        self.client = connection.client
+        for topic in dict.fromkeys([config["data_topic"]] + config["subscriptions"]):
+            connection.subscribe(topic, self.on_message)
+
+    def on_message(self, topic, payload):
+        if not self.executor.submit(topic, payload):
+            print(f"[{self.config['device_id']}] Queue full, dropped message on {topic}")
+
+    def handle(self, topic, payload):
+        self.message_handler(topic, payload, self)
+
+    def stats(self, reset=False):
+        return self.executor.stats(reset)
+
+    def publish(self, topic, payload):
+        result = self.connection.publish(topic, payload)
+        if result.rc != mqtt.MQTT_ERR_SUCCESS:
+            print("Failed to publish:", result.rc)
+
+    def start(self):
+        self.connection.start()
+        print(f"[{self.config['device_id']}] Started")
@@ -0,0 +1,83 @@
+class _TopicNode:
+    def __init__(self):
+        self.children = {}
+        self.handlers = []
+
+
+class TopicRouter:
+    """
+    Trie of MQTT topic filters, one level per node, so matching a topic
+    costs one lookup per level instead of a comparison per subscription.
+
+    Filters follow MQTT rules: "+" matches exactly one level, "#" (last
+    level only) matches the parent level and everything below it. Topics
+    starting with "$" are not matched by a wildcard in the first level.
+    """
+
+    def __init__(self):
+        self.root = _TopicNode()
+        self.topic_filters = set()
+
+    def add(self, topic_filter, handler):
+        """Register handler for topic_filter; returns True if the filter is new"""
+        levels = topic_filter.split("/")
+        for i, level in enumerate(levels):
+            if level == "#" and i != len(levels) - 1:
+                raise ValueError(f"'#' must be the last level: {topic_filter}")
+            if level not in ("+", "#") and ("+" in level or "#" in level):
+                raise ValueError(f"Wildcards must fill a whole level: {topic_filter}")
+        node = self.root
+        for level in levels:
+            node = node.children.setdefault(level, _TopicNode())
+        node.handlers.append(handler)
+        is_new = topic_filter not in self.topic_filters
+        self.topic_filters.add(topic_filter)
+        return is_new
+
+    def remove(self, topic_filter, handler):
+        """Unregister handler; returns True if no handler is left for the filter"""
+        path = [self.root]
+        for level in topic_filter.split("/"):
+            node = path[-1].children.get(level)
+            if node is None:
+                return False
+            path.append(node)
+        path[-1].handlers.remove(handler)
+        if path[-1].handlers:
+            return False
+        self.topic_filters.discard(topic_filter)
+        # Prune nodes that no longer lead anywhere
+        for parent, level, node in zip(reversed(path[:-1]), reversed(topic_filter.split("/")), reversed(path)):
+            if node.handlers or node.children:
+                break
+            del parent.children[level]
+        return True
+
+    def match(self, topic):
+        """Handlers of every filter matching topic, in registration order per filter"""
+        levels = topic.split("/")
+        handlers = []
+        nodes = [self.root]
+        for depth, level in enumerate(levels):
+            next_nodes = []
+            for node in nodes:
+                wildcards = not (depth == 0 and level.startswith("$"))
+                multi = node.children.get("#") if wildcards else None
+                if multi is not None:
+                    handlers.extend(multi.handlers)
+                child = node.children.get(level)
+                if child is not None:
+                    next_nodes.append(child)
+                single = node.children.get("+") if wildcards else None
+                if single is not None:
+                    next_nodes.append(single)
+            nodes = next_nodes
+            if not nodes:
+                return handlers
+        for node in nodes:
+            handlers.extend(node.handlers)
+            # "a/#" also matches "a"
+            multi = node.children.get("#")
+            if multi is not None:
+                handlers.extend(multi.handlers)
+        return handlers
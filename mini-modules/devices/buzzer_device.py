@@ -1,12 +1,165 @@
 from gpiozero import PWMOutputDevice
-from time import sleep
+from collections import OrderedDict, deque
+import threading
+import time
 
 buzzer = PWMOutputDevice(18)
 
+NOTE_GAP = 0.05     # Silence between tones (sec)
+MAX_QUEUED = 16     # Melodies waiting behind the current one; the oldest is dropped beyond this
+MAX_MELODIES = 32   # Melodies kept in the library; the least recently used is dropped beyond this
+
+def build_schedule(notes, duration):
+    """(frequency Hz, duration sec) per tone; a frequency of 0 is a rest"""
+    return [(max(int(tone), 0), float(duration)) for tone in notes]
+
+class BuzzerPlayer:
+    """
+    Plays melodies on a worker thread so the MQTT callback never sleeps.
+
+    Tones are timed against the monotonic clock from the start of the
+    melody, so per-note overhead does not add up over a long melody. A
+    "preempt" command cuts the current melody short and clears the queue;
+    an "enqueue" command plays after everything already queued.
+    """
+
+    def __init__(self, device, gap=NOTE_GAP, max_queued=MAX_QUEUED):
+        self.device = device
+        self.gap = gap
+        self.pending = deque(maxlen=max_queued)
+        self.condition = threading.Condition()
+        self.generation = 0  # Bumped by every preempt; a playing melody stops when it changes
+        self.thread = None
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, name="buzzer-player", daemon=True)
+            self.thread.start()
+
+    def play(self, schedule, mode="enqueue"):
+        with self.condition:
+            if mode == "preempt":
+                self.pending.clear()
+                self.generation += 1
+            elif len(self.pending) == self.pending.maxlen:
+                print("[Buzzer] Queue full, dropping oldest melody")
+            if schedule:
+                self.pending.append(schedule)
+            self.condition.notify_all()
+
+    def stop(self):
+        self.play([], mode="preempt")
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while not self.pending:
+                    self.condition.wait()
+                schedule = self.pending.popleft()
+                generation = self.generation
+            self._play(schedule, generation)
+
+    def _play(self, schedule, generation):
+        deadline = time.monotonic()
+        try:
+            for tone, duration in schedule:
+                if tone > 0:
+                    self.device.frequency = tone
+                    self.device.value = 0.5
+                    print(f"[Buzzer] Playing tone: {tone}Hz")
+                deadline += duration
+                if not self._wait_until(deadline, generation):
+                    return
+                self.device.off()
+                deadline += self.gap  # short pause between tones
+                if not self._wait_until(deadline, generation):
+                    return
+        finally:
+            self.device.off()
+
+    def _wait_until(self, deadline, generation):
+        """Sleep until deadline; False if a preempt arrived first"""
+        with self.condition:
+            while self.generation == generation:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return True
+                self.condition.wait(remaining)
+            return False
+
+class MelodyLibrary:
+    """
+    Melodies uploaded once over the config topic and then played by ID.
+    Schedules are built at upload time, so playing one parses nothing;
+    the least recently used melody is evicted once `capacity` is reached.
+    """
+
+    def __init__(self, capacity=MAX_MELODIES):
+        self.capacity = capacity
+        self.melodies = OrderedDict()  # melody_id -> (version, schedule)
+
+    def store(self, melody_id, version, schedule):
+        """Keep the melody unless the same or a newer version is stored; returns True if stored"""
+        current = self.melodies.get(melody_id)
+        if current is not None and current[0] >= version:
+            self.melodies.move_to_end(melody_id)
+            return False
+        self.melodies[melody_id] = (version, tuple(schedule))
+        self.melodies.move_to_end(melody_id)
+        while len(self.melodies) > self.capacity:
+            evicted, _ = self.melodies.popitem(last=False)
+            print(f"[Buzzer] Library full, dropped melody: {evicted}")
+        return True
+
+    def get(self, melody_id):
+        entry = self.melodies.get(melody_id)
+        if entry is None:
+            return None
+        self.melodies.move_to_end(melody_id)
+        return entry[1]
+
+    def versions(self):
+        return {melody_id: version for melody_id, (version, _) in self.melodies.items()}
+
+player = BuzzerPlayer(buzzer)
+library = MelodyLibrary()
+
 def setup():
     buzzer.off()
+    player.start()
     print("[Buzzer] Ready.")
 
+def publish_library(mqtt_client, **data):
+    # Not the data topic: the buzzer subscribes to that and would read its own reply
+    mqtt_client.publish(mqtt_client.config["status_topic"], {
+        "device_id": mqtt_client.config["device_id"],
+        "timestamp": int(time.time() * 1000),
+        "data": dict(data, melodies=library.versions()),
+    })
+
+def handle_config(payload, mqtt_client):
+    """
+    Config topic payloads:
+    {"data": {"melody": {"id": "alarm", "version": 2, "notes": [...], "duration": 0.3}}}
+        Upload; ignored if the same or a newer version is stored
+    {"data": {"melodies": true}}
+        Report the stored versions
+    Both reply on the status topic with {"melodies": {id: version, ...}}
+    """
+    data = payload.get("data", {})
+    melody = data.get("melody")
+    if isinstance(melody, dict):
+        notes = melody.get("notes", [])
+        if not isinstance(notes, list) or "id" not in melody:
+            print("[Buzzer] Invalid melody upload")
+            return
+        melody_id, version = str(melody["id"]), int(melody.get("version", 1))
+        stored = library.store(melody_id, version, build_schedule(notes, melody.get("duration", 0.3)))
+        print(f"[Buzzer] Melody {melody_id} v{version} {'stored' if stored else 'already up to date'}")
+        publish_library(mqtt_client, uploaded=melody_id, stored=stored)
+    elif data.get("melodies"):
+        publish_library(mqtt_client)
+
 def handle_message(topic, payload, mqtt_client):
     """
     Expected payload:
@@ -15,10 +168,33 @@ def handle_message(topic, payload, mqtt_client):
             "notes": [440, 494, 523, 587, 659, 698, 784, ...]   # List of tones (Hz)
                      [330,294,262,294,330,330,294,294,294,330,392,392]
             "duration": 0.3                                     # Optional: duration per tone (sec)
+            "mode": "enqueue"                                   # Optional: "enqueue" after the current
+                                                                # melody, or "preempt" to cut it off
         }
     }
+    or, for a melody uploaded to the library (see handle_config):
+    {"data": {"play": "alarm", "mode": "preempt"}}
+    Returns immediately; the melody is played by the player thread.
     """
     try:
+        if topic == mqtt_client.config.get("config_topic"):
+            handle_config(payload, mqtt_client)
+            return
+
+        mode = payload.get("data", {}).get("mode", "enqueue")
+        if mode not in ("enqueue", "preempt"):
+            print(f"[Buzzer] Invalid mode: {mode}")
+            return
+
+        melody_id = payload.get("data", {}).get("play")
+        if melody_id is not None:
+            schedule = library.get(str(melody_id))
+            if schedule is None:
+                print(f"[Buzzer] Unknown melody: {melody_id}")
+                return
+            player.play(schedule, mode)
+            return
+
         notes = payload.get("data", {}).get("notes", [])
         duration = payload.get("data", {}).get("duration", 0.3)
 
@@ -26,13 +202,7 @@ def handle_message(topic, payload, mqtt_client):
             print("[Buzzer] Invalid notes format")
             return
 
-        for tone in notes:
-            buzzer.frequency = int(tone)
-            buzzer.value = 0.5
-            print(f"[Buzzer] Playing tone: {tone}Hz")
-            sleep(duration)
-            buzzer.off()
-            sleep(0.05)  # short pause between tones
+        player.play(build_schedule(notes, duration), mode)
 
     except Exception as e:
         print(f"[Buzzer] Error: {e}")
@@ -1,13 +1,15 @@
 from grove.display.jhd1802 import JHD1802
+from hardware.shadow_lcd import LCDRenderer, ShadowLCD
 
 lcd = JHD1802()
+# Only changed characters are written, from the renderer thread; bursts coalesce to the latest frame
+shadow = ShadowLCD(lcd, rows=2, cols=16)
+renderer = LCDRenderer(shadow)
 
 def setup():
-    lcd.clear()
-    lcd.setCursor(0, 0)
-    lcd.write("LCD Ready...")
-    lcd.setCursor(1, 0)
-    lcd.write("Waiting...")
+    shadow.reset()
+    renderer.start()
+    renderer.show(["LCD Ready...", "Waiting..."])
 
 def handle_message(topic, payload, mqtt_client):
     """
@@ -25,12 +27,8 @@ def handle_message(topic, payload, mqtt_client):
     try:
         emotion = payload.get("data", {}).get("emotion", "No emotion")
 
-        lcd.clear()
-        lcd.setCursor(0, 0)
-        if "clicked" not in str(emotion).lower():
-            lcd.write("Emotion:")
-        lcd.setCursor(1, 0)
-        lcd.write(str(emotion)[:16])
+        top = "" if "clicked" in str(emotion).lower() else "Emotion:"
+        renderer.show([top, str(emotion)[:16]])
         print(f"[LCD] Displayed emotion: {emotion}")
 
     except Exception as e:
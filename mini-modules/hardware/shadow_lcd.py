@@ -0,0 +1,165 @@
+import threading
+import time
+
+class ShadowLCD:
+    """
+    Keeps a copy of what the character LCD shows and only sends the
+    characters that changed, instead of clear() and a full rewrite.
+
+    On the JHD1802 every setCursor and every written character is its own
+    I2C transaction, and clear() is one more plus a ~2 ms wait with the panel
+    blank (the visible flicker). Changed characters are written as runs; a
+    run that starts where the cursor already is needs no setCursor, and two
+    runs one unchanged character apart are merged since rewriting that
+    character costs the same as moving the cursor.
+    """
+
+    def __init__(self, lcd, rows=2, cols=16):
+        self.lcd = lcd
+        self.rows = rows
+        self.cols = cols
+        self.shown = None   # Rows currently on the panel; None until reset()
+        self.cursor = None  # (row, col) the panel's cursor is at, if known
+
+    def reset(self):
+        """Clear the panel once and start tracking it"""
+        self.lcd.clear()
+        self.shown = [" " * self.cols for _ in range(self.rows)]
+        self.cursor = (0, 0)
+
+    def fit(self, lines):
+        lines = list(lines)[:self.rows]
+        lines += [""] * (self.rows - len(lines))
+        return [str(line)[:self.cols].ljust(self.cols) for line in lines]
+
+    def render(self, lines):
+        """Show `lines` (one string per row); returns the number of characters written"""
+        if self.shown is None:
+            self.reset()
+        written = 0
+        for row, line in enumerate(self.fit(lines)):
+            for start, end in self._runs(self.shown[row], line):
+                if self.cursor != (row, start):
+                    self.lcd.setCursor(row, start)
+                self.lcd.write(line[start:end])
+                self.cursor = (row, end) if end < self.cols else None
+                written += end - start
+            self.shown[row] = line
+        return written
+
+    def _runs(self, old, new):
+        runs = []
+        for col in range(self.cols):
+            if old[col] == new[col]:
+                continue
+            if runs and col - runs[-1][1] <= 1:
+                runs[-1][1] = col + 1
+            else:
+                runs.append([col, col + 1])
+        return runs
+
+class LCDRenderer:
+    """
+    Draws frames on its own thread. show() only replaces the pending frame,
+    so when updates arrive faster than the panel can be written, the ones in
+    between are skipped and the latest frame is drawn (latest wins).
+    """
+
+    def __init__(self, shadow):
+        self.shadow = shadow
+        self.condition = threading.Condition()
+        self.pending = None
+        self.thread = None
+        self.rendered = 0
+        self.coalesced = 0  # Frames replaced before they were drawn
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, name="lcd-renderer", daemon=True)
+            self.thread.start()
+
+    def show(self, lines):
+        with self.condition:
+            if self.pending is not None:
+                self.coalesced += 1
+            self.pending = list(lines)
+            self.condition.notify()
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while self.pending is None:
+                    self.condition.wait()
+                lines, self.pending = self.pending, None
+            try:
+                self.shadow.render(lines)
+                self.rendered += 1
+            except Exception as e:
+                # The panel state is unknown after a failed write; start over with a clear
+                print(f"[LCD] Error rendering: {e}")
+                self.shadow.shown = None
+
+class CountingLCD:
+    """Stand-in for JHD1802 that counts I2C transactions the way the driver issues them"""
+
+    def __init__(self, i2c_delay=0.0):
+        self.transactions = 0
+        self.i2c_delay = i2c_delay
+
+    def _transfer(self, n):
+        self.transactions += n
+        if self.i2c_delay:
+            time.sleep(n * self.i2c_delay)
+
+    def clear(self):
+        self._transfer(1)
+
+    def setCursor(self, row, col):
+        self._transfer(1)
+
+    def write(self, text):
+        self._transfer(len(text))
+
+def _benchmark(n_updates=200):
+    emotions = ["happy", "sad", "angry", "surprised", "neutral", "clicked", "happy", "happy"]
+    frames = [["" if "clicked" in e else "Emotion:", e] for e in
+              (emotions[i % len(emotions)] for i in range(n_updates))]
+
+    # Before: what lcd_device did for every message
+    lcd = CountingLCD()
+    for top, bottom in frames:
+        lcd.clear()
+        lcd.setCursor(0, 0)
+        lcd.write(top)
+        lcd.setCursor(1, 0)
+        lcd.write(bottom)
+    full = lcd.transactions
+
+    lcd = CountingLCD()
+    shadow = ShadowLCD(lcd)
+    shadow.reset()
+    for frame in frames:
+        shadow.render(frame)
+    diff = lcd.transactions
+
+    # Updates every 0.5 ms against a panel that takes ~0.1 ms per transaction
+    lcd = CountingLCD(i2c_delay=1e-4)
+    shadow = ShadowLCD(lcd)
+    shadow.reset()
+    renderer = LCDRenderer(shadow)
+    renderer.start()
+    for frame in frames:
+        renderer.show(frame)
+        time.sleep(5e-4)
+    while renderer.pending is not None:
+        time.sleep(0.001)
+    time.sleep(0.05)
+
+    print(f"{n_updates} updates")
+    print(f"  clear + full rewrite : {full / n_updates:6.1f} I2C transactions/update")
+    print(f"  shadow diff          : {diff / n_updates:6.1f} I2C transactions/update")
+    print(f"  diff + coalescing    : {lcd.transactions / n_updates:6.1f} I2C transactions/update "
+          f"({renderer.rendered} frames drawn, {renderer.coalesced} coalesced)")
+
+if __name__ == "__main__":
+    _benchmark()
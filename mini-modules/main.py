@@ -1,4 +1,4 @@
-from core.mqtt_client import MQTTDeviceClient
+from core.mqtt_client import MQTTConnection, MQTTDeviceClient
 from devices.fan_device import handle_message as fan_handler
 from devices.button_device import handle_message as button_handler, setup as setup_button, handle_button_press
 from devices.lcd_device import handle_message as lcd_handler, setup as setup_lcd
@@ -7,11 +7,16 @@ from config.fan_config import config as fan_config
 from config.button_config import config as button_config
 from config.lcd_config import config as lcd_config
 from config.buzzer_config import config as buzzer_config
+from config.node_config import config as node_config
 
-fan_client = MQTTDeviceClient(fan_config, fan_handler)
-button_client = MQTTDeviceClient(button_config, button_handler)
-lcd_client = MQTTDeviceClient(lcd_config, lcd_handler)
-buzzer_client = MQTTDeviceClient(buzzer_config, buzzer_handler)
+# All devices share one broker connection; each keeps its own device_id and topics
+connection = MQTTConnection(node_config["client_id"], node_config["mqtt_mdns_name"])
+fan_client = MQTTDeviceClient(fan_config, fan_handler, connection)
+button_client = MQTTDeviceClient(button_config, button_handler, connection)
+lcd_client = MQTTDeviceClient(lcd_config, lcd_handler, connection)
+buzzer_client = MQTTDeviceClient(buzzer_config, buzzer_handler, connection)
+
+STATS_PERIOD = 60  # seconds
 
 def main():
     fan_client.start()
@@ -23,8 +28,14 @@ def main():
     setup_buzzer()
 
     import time
+    # Print each device's queue and handler counters now and then
+    last_report = time.monotonic()
     while True:
         time.sleep(1)
+        if time.monotonic() - last_report >= STATS_PERIOD:
+            last_report = time.monotonic()
+            for device in (fan_client, button_client, lcd_client, buzzer_client):
+                print(f"[{device.config['device_id']}] Handler stats: {device.stats(reset=True)}")
 
 if __name__ == "__main__":
     main()
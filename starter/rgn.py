@@ -3,9 +3,14 @@ import json
 import random
 import socket
 import os
+import sys
 import paho.mqtt.client as mqtt
 import camera_controller
 
+# The outbox module lives with the glove controller; one copy for every paho client
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "glove-controller", "src"))
+from outbox import paho_outbox
+
 # Configuration parameters
 device_id = "ksyhwGSfpMJ2kqt5dB4ydH"
 mqtt_mdns_name = "platform.local" # "192.168.0.104" # "platform-mmqtt.local"  # Attempt to resolve MQTT broker hostname via mDNS
@@ -18,6 +23,11 @@ updateInterval = 6000
 # File to store configuration (simulating Preferences)
 PREFS_FILE = "esp32-data.json"
 
+# Readings that could not be published are kept here until the broker is back
+OUTBOX_FILE = "mqtt-outbox.db"
+MQTT_KEEPALIVE = 60  # Seconds
+outbox = None  # Outbox, created in main
+
 
 def load_preferences():
     global updateInterval
@@ -87,6 +97,14 @@ def on_message(client, userdata, msg):
         print("Error processing message:", e)
 
 
+def publish_payload(payload):
+    payload_str = json.dumps(payload)
+    if outbox.publish(mqtt_data_topic, payload_str):
+        print("Data published:", payload_str)
+    else:
+        print("Broker unavailable, data stored in outbox, depth:", outbox.depth)
+
+
 def publish_data(client):
     generatedNumber = random.randint(0, 999)
     payload = {
@@ -97,12 +115,7 @@ def publish_data(client):
             "testBool": True
         }
     }
-    payload_str = json.dumps(payload)
-    result = client.publish(mqtt_data_topic, payload_str)
-    if result.rc == mqtt.MQTT_ERR_SUCCESS:
-        print("Data published:", payload_str)
-    else:
-        print("Data publish failed, error code:", result.rc)
+    publish_payload(payload)
 
 def publish_emotion(client, emotion):
     payload = {
@@ -113,15 +126,11 @@ def publish_emotion(client, emotion):
             "testBool": True
         }
     }
-    payload_str = json.dumps(payload)
-    result = client.publish(mqtt_data_topic, payload_str)
-    if result.rc == mqtt.MQTT_ERR_SUCCESS:
-        print("Data published:", payload_str)
-    else:
-        print("Data publish failed, error code:", result.rc)
+    publish_payload(payload)
 
 
 def main():
+    global outbox
     emotion = camera_controller.detect_emotions('the_guys.jpg')[0]
     global updateInterval
 
@@ -139,7 +148,7 @@ def main():
     while True:
         try:
             print("Attempting to connect to MQTT broker...")
-            client.connect(broker_ip, port=1883, keepalive=60)
+            client.connect(broker_ip, port=1883, keepalive=MQTT_KEEPALIVE)
             break
         except Exception as e:
             print("MQTT connection error:", e)
@@ -147,18 +156,23 @@ def main():
 
     # Start background thread for MQTT network loop
     client.loop_start()
+    outbox = paho_outbox(OUTBOX_FILE, client, ack_timeout=2 * MQTT_KEEPALIVE)
     published = False
     try:
         while True:
             if not published:
                 publish_emotion(client, emotion)
                 published = True
+            # Send stored readings once the broker is reachable again
+            outbox.drain()
             time.sleep(0.1)
     except KeyboardInterrupt:
         print("Exiting program...")
     finally:
+        print("Outbox:", outbox.metrics())
         client.loop_stop()
         client.disconnect()
+        outbox.close()
 
     
 